@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from utils import log, suppress_warnings, build_parser, build_config, iter_media_files
+from providers import get_whisper_model
+from jobs import get_job_manifest, run_id
+from actions import plan_media
+from worker import process_media, manifest_params
+from synthetic import write_media
+
+# Stages timed by the job manifest, plus the model load timed here
+STAGES = ('load', 'decode', 'transcribe', 'translate', 'write')
+
+def parse_case(value: str) -> tuple[int, int]:
+    """
+    Parses a benchmark case written as SECONDSxTRACKS, for example 120x1 or 60x3.
+    """
+    try:
+        seconds, _, tracks = value.lower().partition("x")
+        seconds, tracks = int(seconds), int(tracks or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid case {value}, expected SECONDSxTRACKS")
+    if seconds <= 0 or tracks <= 0:
+        raise argparse.ArgumentTypeError(f"invalid case {value}, seconds and tracks must be positive")
+    return seconds, tracks
+
+def case_name(seconds: int, tracks: int) -> str:
+    return f"speech_{seconds}s_{tracks}trk"
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident memory of this process or any of its finished children, in megabytes.
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / 1024 if sys.platform != "darwin" else peak / 1024 / 1024
+
+def run_case(seconds: int, tracks: int, folder: str, options: list) -> dict:
+    """
+    Runs one benchmark case in a fresh process: writes the synthetic media file, loads the model
+    and runs process_media over it. Returns the case result and the captured log.
+    """
+    suppress_warnings()
+    name = case_name(seconds, tracks)
+    media_folder = os.path.join(folder, name)
+    os.makedirs(media_folder, exist_ok=True)
+    media_file = os.path.join(media_folder, f"{name}.{'wav' if tracks == 1 else 'mkv'}")
+    write_media(media_file, seconds, tracks)
+
+    # Every cache lives in the case folder and is disabled or empty, so every run does the full work
+    config = build_config(build_parser().parse_args([
+        "-m", media_folder, "-n", "tiny", "-d", "cpu", "-sl", "en", "-te", "overwrite",
+        "-t", "all" if tracks > 1 else "1", "--no-cache",
+        "--media-index", os.path.join(folder, f"{name}.index.sqlite"),
+        "--translation-memory", os.path.join(folder, f"{name}.tm.sqlite"),
+        "--manifest", os.path.join(folder, f"{name}.manifest.sqlite")
+    ] + options))
+
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        start = time.perf_counter()
+        model = get_whisper_model(config)
+        load = time.perf_counter() - start
+        if model is not None:
+            start = time.perf_counter()
+            process_media(config, iter_media_files(media_folder, config.sourcetype))
+            wall = time.perf_counter() - start
+            plans = plan_media(config, [media_file])
+
+    if model is None:
+        return {'name': name, 'failed': True}, buffer.getvalue()
+    stages = {'load': load, 'decode': 0.0, 'transcribe': 0.0, 'translate': 0.0, 'write': 0.0}
+    if config.manifest:
+        stages.update(get_job_manifest(config.manifest_path).timings(run_id(manifest_params(config))))
+
+    # Outputs are every file written next to the media file, by format
+    outputs = {}
+    for entry in os.scandir(media_folder):
+        if entry.path != media_file:
+            extension = os.path.splitext(entry.name)[1].lstrip(".")
+            outputs[extension] = outputs.get(extension, 0) + entry.stat().st_size
+
+    audio = seconds * tracks
+    return {
+        'name': name,
+        'seconds': seconds,
+        'tracks': tracks,
+        'audio_seconds': audio,
+        'wall': round(wall, 3),
+        'rtf': round(wall / audio, 4),
+        'stages': {stage: round(elapsed, 3) for stage, elapsed in stages.items()},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'output_bytes': outputs,
+        'failed': not all(target.exists for plan in plans for target in plan.targets)
+    }, buffer.getvalue()
+
+def environment() -> dict:
+    """
+    Describes the machine and versions the results were measured with.
+    """
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+    for module in ('torch', 'whisper', 'transformers', 'numpy'):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            info[module] = None
+    try:
+        info['commit'] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        info['commit'] = None
+    return info
+
+def compare(results: dict, baseline: dict, threshold: float, rss_threshold: float, min_seconds: float) -> list:
+    """
+    Compares the results with a baseline and logs every metric of every case found in both.
+    A time regresses when it grows by more than threshold (relative) and min_seconds;
+    peak memory regresses when it grows by more than rss_threshold.
+    Returns the regressions.
+    """
+    regressions = []
+    previous = {case['name']: case for case in baseline.get('cases', []) if not case.get('failed')}
+    for case in results['cases']:
+        old = previous.get(case['name'])
+        if old is None or case.get('failed'):
+            log(f"{case['name']}: no baseline to compare with")
+            continue
+        metrics = [('wall', old['wall'], case['wall'], threshold, min_seconds),
+                   ('rtf', old['rtf'], case['rtf'], threshold, min_seconds / case['audio_seconds'])]
+        metrics += [(stage, old['stages'].get(stage, 0.0), case['stages'].get(stage, 0.0), threshold, min_seconds) for stage in STAGES]
+        metrics += [('peak_rss_mb', old['peak_rss_mb'], case['peak_rss_mb'], rss_threshold, 0.0)]
+        for metric, before, after, limit, floor in metrics:
+            change = (after - before) / before if before else 0.0
+            regressed = after - before > floor and change > limit
+            if regressed:
+                regressions.append(f"{case['name']} {metric}")
+            log(f"{case['name']} {metric}: {before:g} -> {after:g} ({change:+.1%}){' REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the takigrapher pipeline end to end on synthetic audio",
+        usage="python3 benchmarks/run.py [--cases SECONDSxTRACKS ...] [--repeat N] [--output FILE] [--baseline FILE] [--save-baseline] [-- transcription options]",
+        prog="run.py"
+    )
+    parser.add_argument("--cases", dest="cases", metavar="SECONDSxTRACKS", nargs="+", type=parse_case,
+                        help="synthetic media files to process, as audio seconds x audio tracks. (Default: 30x1 120x1 60x3)",
+                        default=[(30, 1), (120, 1), (60, 3)])
+    parser.add_argument("--repeat", dest="repeat", metavar="N", action="store",
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("repeat must be a positive integer"),
+                        help="runs of every case, keeping the fastest. (Default: 1)", default=1)
+    parser.add_argument("--output", dest="output", metavar="FILE", action="store", type=str,
+                        help="results file. (Default: benchmarks/results.json)", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--baseline", dest="baseline", metavar="FILE", action="store", type=str,
+                        help="baseline results to compare with. (Default: benchmarks/baseline.json)", default=os.path.join(ROOT, "benchmarks", "baseline.json"))
+    parser.add_argument("--save-baseline", dest="save_baseline", action="store_true",
+                        help="store the results as the new baseline", default=False)
+    parser.add_argument("--threshold", dest="threshold", metavar="RATIO", action="store", type=float,
+                        help="relative growth of a time that counts as a regression. (Default: 0.1)", default=0.1)
+    parser.add_argument("--rss-threshold", dest="rss_threshold", metavar="RATIO", action="store", type=float,
+                        help="relative growth of the peak memory that counts as a regression. (Default: 0.1)", default=0.1)
+    parser.add_argument("--min-seconds", dest="min_seconds", metavar="SECONDS", action="store", type=float,
+                        help="smallest growth of a time that counts as a regression, to ignore noise on short stages. (Default: 0.25)", default=0.25)
+    parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
+                        help="print the log of every run", default=False)
+    argv = sys.argv[1:]
+    options = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+
+    # Every run gets a fresh process, so the model load and the peak memory are its own
+    cases = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="takigrapher-bench-") as folder:
+        for seconds, tracks in args.cases:
+            best = None
+            for attempt in range(args.repeat):
+                log(f"Running {case_name(seconds, tracks)} ({attempt + 1}/{args.repeat})")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result, output = executor.submit(run_case, seconds, tracks, os.path.join(folder, str(attempt)), options).result()
+                if args.verbose:
+                    print(output, end="")
+                if result['failed']:
+                    log(f"ERROR: {result['name']} failed, rerun with --verbose to see its log")
+                    best = result
+                    break
+                log(f"{result['name']}: {result['wall']:.2f}s, {result['rtf']:.3f}s per audio second, peak {result['peak_rss_mb']:.0f} MB, "
+                    f"{', '.join(f'{stage} {elapsed:.2f}s' for stage, elapsed in result['stages'].items())}")
+                if best is None or result['wall'] < best['wall']:
+                    best = result
+            cases.append(best)
+
+    results = {'environment': environment(), 'options': options, 'cases': cases}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    log(f"Results written to {args.output}")
+
+    failed = [case['name'] for case in cases if case['failed']]
+    regressions = []
+    if os.path.isfile(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        log(f"Comparing with {args.baseline} (commit {baseline.get('environment', {}).get('commit')})")
+        regressions = compare(results, baseline, args.threshold, args.rss_threshold, args.min_seconds)
+    if args.save_baseline and not failed:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        log(f"Baseline written to {args.baseline}")
+
+    if failed or regressions:
+        log(f"{len(failed)} failed cases, {len(regressions)} regressions: {', '.join(failed + regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,3 +1,6 @@
-from .transcriber import transcribe_media
+from .transcriber import validate_media_file, transcription_params, lookup_transcription, decode_media_tracks, run_transcription, filter_speech, remap_transcription, vad_stats, log_vad_stats
+from .chunker import transcribe_chunked, merge_transcriptions, shutdown_chunk_pool
 from .transformer import transform_media
-from .translator import translate_media
\ No newline at end of file
+from .translator import translate_media
+from .planner import plan_media, resolve_targets, report_plan, prefetch_metadata
+from .scheduler import schedule_groups, predict_makespan
\ No newline at end of file
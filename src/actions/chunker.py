@@ -0,0 +1,117 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from utils import log, suppress_warnings, find_silence_splits
+from models import Transcription
+from providers import transcribe_audio, resolve_device, SAMPLE_RATE
+
+_chunk_pool = None
+
+def _init_chunk_worker(threads: int):
+    """
+    Initializes a chunk worker process.
+    """
+    suppress_warnings()
+    import torch
+    torch.set_num_threads(threads)
+
+def _transcribe_chunk(config: Transcription, audio, language: str) -> dict:
+    """
+    Transcribes one chunk in a chunk worker process, on the warm model of that process.
+    """
+    return transcribe_audio(config, audio, language)
+
+def get_chunk_pool(config: Transcription) -> ProcessPoolExecutor:
+    """
+    Returns the pool of chunk worker processes, starting it on first use.
+    The pool is kept for every long file of the run, so each worker loads its model once.
+    """
+    global _chunk_pool
+    if _chunk_pool is None:
+        threads = config.threads if config.threads else max(1, (os.cpu_count() or 1) // config.chunk_workers)
+        log(f"Starting {config.chunk_workers} chunk worker processes with {threads} torch threads each")
+        _chunk_pool = ProcessPoolExecutor(max_workers=config.chunk_workers,
+                                          mp_context=multiprocessing.get_context("spawn"),
+                                          initializer=_init_chunk_worker,
+                                          initargs=(threads,))
+    return _chunk_pool
+
+def shutdown_chunk_pool():
+    """
+    Stops the chunk worker processes, if they were started.
+    """
+    global _chunk_pool
+    if _chunk_pool is not None:
+        _chunk_pool.shutdown(wait=True, cancel_futures=True)
+        _chunk_pool = None
+
+def merge_transcriptions(results: list, offsets: list) -> dict:
+    """
+    Merges the Whisper results of consecutive chunks into a single result, as if the
+    whole audio had been transcribed at once: segment and word timestamps are shifted
+    by the chunk offset (seconds) and segment ids are renumbered contiguously.
+    """
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result['segments']:
+            segment = dict(segment)
+            segment['id'] = len(segments)
+            segment['start'] = round(segment['start'] + offset, 3)
+            segment['end'] = round(segment['end'] + offset, 3)
+            if 'seek' in segment:
+                # Whisper seeks in mel frames of 10 ms
+                segment['seek'] += round(offset * 100)
+            if 'words' in segment:
+                segment['words'] = [dict(word,
+                                         start=round(word['start'] + offset, 3),
+                                         end=round(word['end'] + offset, 3))
+                                    for word in segment['words']]
+            segments.append(segment)
+    return {
+        'text': "".join(result['text'] for result in results),
+        'segments': segments,
+        'language': results[0]['language'] if results else None
+    }
+
+def transcribe_chunked(config: Transcription, audio) -> dict:
+    """
+    Splits long audio at silences into chunks of about config.chunk_length seconds,
+    transcribes the chunks in parallel on the chunk worker processes and stitches the results.
+    Without a source language, the language detected on the first chunk is used for the others,
+    like Whisper does for a single call.
+    Short audio is transcribed in a single call.
+    """
+    splits = find_silence_splits(audio, SAMPLE_RATE, config.chunk_length)
+    if not splits:
+        return transcribe_audio(config, audio)
+
+    bounds = [0] + splits + [len(audio)]
+    chunks = [audio[start:end] for start, end in zip(bounds, bounds[1:])]
+    offsets = [start / SAMPLE_RATE for start in bounds[:-1]]
+
+    # Processes only pay off on CPU (as resolved: no --device means CUDA when available)
+    # and outside of file worker processes
+    parallel = config.chunk_workers > 1 and resolve_device(config) == "cpu" and multiprocessing.parent_process() is None
+    log(f"Transcribing {len(chunks)} chunks of about {config.chunk_length}s{' in parallel' if parallel else ''}")
+    chunk_config = replace(config, verbose=None)
+
+    def run(selected: list, language: str) -> list:
+        if not parallel:
+            return [transcribe_audio(chunk_config, chunk, language) for chunk in selected]
+        return list(get_chunk_pool(config).map(_transcribe_chunk,
+                                               [chunk_config] * len(selected),
+                                               selected,
+                                               [language] * len(selected)))
+
+    results = []
+    language = config.sourcelanguage
+    if language is None:
+        results = run(chunks[:1], None)
+        if results[0] is None:
+            return None
+        language = results[0]['language']
+    results += run(chunks[len(results):], language)
+    if any(result is None for result in results):
+        return None
+    return merge_transcriptions(results, offsets)
@@ -0,0 +1,114 @@
+import os
+from utils import log, format_duration
+from models import Transcription, MediaPlan, TargetPlan
+from cache import media_index_for
+
+def resolve_targets(config: Transcription, media_file_path: str, detected_language: str = None, track: int = None) -> list:
+    """
+    Computes the target files of a media file from the configuration.
+    With --track all, every audio track gets its own targets, tagged with the track number.
+    Returns a list of TargetPlan, or None if the paths depend on a language that is not known yet.
+    """
+    sourcelanguage = config.sourcelanguage if config.sourcelanguage is not None else detected_language
+    targetlanguage = config.targetlanguage
+
+    if targetlanguage is not None and sourcelanguage is None:
+        # Whether a translation happens depends on the detected language
+        translating = None
+    else:
+        translating = targetlanguage is not None and targetlanguage != sourcelanguage
+
+    jobs = []
+    if config.exportall:
+        if translating is None:
+            return None
+        if translating:
+            jobs.append(('translation', targetlanguage))
+        if sourcelanguage is None:
+            return None
+        jobs.append(('transcription', sourcelanguage))
+    else:
+        lng = ""
+        if config.targetsuffix:
+            lng = targetlanguage if targetlanguage is not None else sourcelanguage
+            if lng is None:
+                return None
+        jobs.append(('transcription' if translating is False else 'translation', lng))
+
+    base = os.path.splitext(os.path.abspath(media_file_path))[0]
+    if config.track == 'all':
+        base += f".track{track}"
+    targets = []
+    for job, lng in jobs:
+        for targettype in config.targettype:
+            path = base + (f".{lng}" if lng else "") + f".{targettype}"
+            targets.append(TargetPlan(job=job, targettype=targettype, path=path, exists=os.path.exists(path)))
+    return targets
+
+def plan_media(config: Transcription, media_files: list) -> list:
+    """
+    Builds a MediaPlan for every media file (for every audio track with --track all) before any model is loaded.
+    """
+    index = None
+    if config.track == 'all':
+        # Track counts come from the media index; probe every file in parallel first
+        index = media_index_for(config)
+        index.prefetch(media_files)
+
+    plans = []
+    for media_file_path in media_files:
+        try:
+            size = os.path.getsize(media_file_path)
+        except OSError:
+            size = 0
+        if index is not None:
+            info = index.get(media_file_path)
+            tracks = list(range(1, info.audio_tracks + 1)) if info is not None else []
+            if not tracks:
+                log(f"WARNING: No audio tracks found in {media_file_path}")
+        else:
+            tracks = [config.track]
+        for track in tracks:
+            plans.append(MediaPlan(media_file=media_file_path,
+                                   track=track,
+                                   targets=resolve_targets(config, media_file_path, track=track),
+                                   size=size))
+    return plans
+
+def prefetch_metadata(config: Transcription, plans: list):
+    """
+    Starts probing the pending media files in the background, so metadata is ready when they are decoded.
+    """
+    media_index_for(config).prefetch(list(dict.fromkeys(plan.media_file for plan in plans if plan.pending(config.targetexists))))
+
+def report_plan(config: Transcription, plans: list, wait_for_metadata: bool = False):
+    """
+    Logs how much work is left according to the plan.
+    With wait_for_metadata, waits for the media index to report the pending audio duration.
+    """
+    pending = [plan for plan in plans if plan.pending(config.targetexists)]
+    undetermined = [plan for plan in pending if not plan.determined]
+    targets_total = sum(len(plan.targets) for plan in plans if plan.determined)
+    targets_present = sum(1 for plan in plans if plan.determined for target in plan.targets if target.exists)
+    pending_bytes = sum({plan.media_file: plan.size for plan in pending}.values())
+
+    unit = "media tracks" if config.track == 'all' else "media files"
+    log(f"Plan: {len(pending)}/{len(plans)} {unit} pending ({pending_bytes / (1024 * 1024):.1f} MB), {len(plans) - len(pending)} already done")
+    log(f"Plan: {targets_present}/{targets_total} known targets already present")
+    if undetermined:
+        log(f"Plan: {len(undetermined)} {unit} need language detection before their targets are known")
+    if wait_for_metadata and pending:
+        index = media_index_for(config)
+        infos = [index.get(media_file) for media_file in dict.fromkeys(plan.media_file for plan in pending)]
+        duration = sum(info.duration or 0.0 for info in infos if info is not None)
+        unreadable = sum(1 for info in infos if info is None or info.audio_tracks == 0)
+        log(f"Plan: {format_duration(duration)} of pending media")
+        if unreadable:
+            log(f"Plan: {unreadable} pending media files have no readable audio track")
+    if config.verbose:
+        for plan in pending:
+            if plan.determined:
+                missing = [target.path for target in plan.targets if not target.exists or config.targetexists != 'skip']
+                log(f"Pending: {plan.media_file} (track {plan.track}) -> {', '.join(missing)}")
+            else:
+                log(f"Pending: {plan.media_file} (track {plan.track}) -> (depends on detected language)")
@@ -0,0 +1,59 @@
+import heapq
+from utils import log, format_duration
+from models import Transcription
+from cache import media_index_for
+
+def predict_makespan(costs: list, workers: int = 1) -> float:
+    """
+    Predicts when the last of the jobs finishes, in seconds, when every job goes in order
+    to the first free worker.
+    """
+    finish = [0.0] * max(1, workers)
+    for cost in costs:
+        heapq.heapreplace(finish, finish[0] + cost)
+    return max(finish)
+
+def group_duration(config: Transcription, plans: list) -> float:
+    """
+    Returns the audio duration to transcribe for the planned tracks of a media file, in seconds.
+    """
+    info = media_index_for(config).get(plans[0].media_file)
+    if info is None or not info.duration:
+        return 0.0
+    return info.duration * len(plans)
+
+def schedule_groups(config: Transcription, groups: list, rtf: float) -> tuple[list, float]:
+    """
+    Orders the pending media files by duration (longest first packs the workers best,
+    shortest first gives results sooner) and, with a time budget, keeps only the files
+    predicted to finish within it. rtf is the processing time per second of audio.
+    Returns the scheduled groups and their predicted makespan in seconds.
+    """
+    workers = config.workers
+    durations = [group_duration(config, group) for group in groups]
+    order = list(range(len(groups)))
+    if config.schedule in ('longest', 'shortest'):
+        order.sort(key=lambda i: durations[i], reverse=config.schedule == 'longest')
+
+    scheduled, costs, audio, deferred = [], [], 0.0, []
+    finish = [0.0] * workers
+    for i in order:
+        cost = durations[i] * rtf
+        if config.time_budget and finish[0] + cost > config.time_budget:
+            deferred.append(groups[i])
+            continue
+        heapq.heapreplace(finish, finish[0] + cost)
+        scheduled.append(groups[i])
+        costs.append(cost)
+        audio += durations[i]
+
+    makespan = predict_makespan(costs, workers)
+    order_name = "in discovery order" if config.schedule == 'found' else f"{config.schedule} first"
+    log(f"Schedule: {len(scheduled)} media files ({format_duration(audio)} of audio) {order_name} on {workers} workers, "
+        f"predicted makespan {format_duration(makespan)} at {rtf:.2f}s per audio second")
+    if deferred:
+        log(f"Schedule: {len(deferred)} media files deferred past the {format_duration(config.time_budget)} budget, rerun to process them")
+        if config.verbose:
+            for group in deferred:
+                log(f"Deferred: {group[0].media_file}")
+    return scheduled, makespan
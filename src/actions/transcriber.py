@@ -1,65 +1,198 @@
 import os
-from utils import log, count_audio_tracks, extract_audio_track
+import threading
+import numpy as np
+from utils import log, decode_audio_tracks, speech_regions, span
 from models import Transcription
+from providers import transcribe_audio, SAMPLE_RATE
+from cache import get_transcription_cache, transcription_key, hash_file, media_index_for
+from .chunker import transcribe_chunked
 
-def transcribe_media(config: Transcription, media_file_path: str, audio_track: int = 1) -> tuple[str, str]:
+def transcription_params(config: Transcription) -> dict:
     """
-    Transcribes a media file using Whisper.
-    If audio_track > 1, extracts the specified track before transcription.
+    Returns the decoding parameters that change the transcription result.
+    """
+    params = {
+        'beam_size': config.beam_size,
+        'best_of': config.best_of,
+        'temperature': config.temperature,
+        'prompt': config.prompt,
+        'sourcelanguage': config.sourcelanguage
+    }
+    if config.chunk_length:
+        params['chunk_length'] = config.chunk_length
+    if config.vad:
+        params['vad'] = (config.vad_threshold, config.vad_min_silence)
+    return params
+
+def validate_media_file(media_file_path: str) -> bool:
+    """
+    Checks that the media file exists and is a regular file.
+    """
+    # Check if the media file exists
+    if not os.path.exists(media_file_path):
+        log(f"Media file does not exist: {media_file_path}")
+        return False
+
+    # Check if the media file is a valid file
+    if not os.path.isfile(media_file_path):
+        log(f"Media file is not a valid file: {media_file_path}")
+        return False
+
+    return True
+
+def lookup_transcription(config: Transcription, media_file_path: str, audio_track: int = 1, content_hash: str = None) -> tuple[dict, str]:
+    """
+    Looks up the transcription cache.
+    Returns the cached result (or None on a miss) and the cache key (or None if the cache is disabled).
+    """
+    if not config.cache:
+        return None, None
+    abs_media_file_path = os.path.abspath(media_file_path)
+    cache = get_transcription_cache(config.cache_dir, config.cache_size * 1024 * 1024)
+    if content_hash is None:
+        content_hash = hash_file(abs_media_file_path)
+    cache_key = transcription_key(content_hash, config.model_name, audio_track, transcription_params(config))
+    result = cache.get(cache_key)
+    if result is not None:
+        log(f"Transcription of track {audio_track} found in cache for {abs_media_file_path}")
+    return result, cache_key
+
+def decode_media_tracks(config: Transcription, media_file_path: str, audio_tracks: list) -> list:
+    """
+    Decodes the selected audio tracks of a media file into memory, as 16 kHz mono float samples,
+    reading the container only once.
+    Returns one array per track or None if decoding fails.
     """
     # Input media file
     abs_media_file_path = os.path.abspath(media_file_path)
-    temp_track_file = None
 
-    audio_tracks_qty = count_audio_tracks(abs_media_file_path)
+    media_info = media_index_for(config).get(abs_media_file_path)
+    if media_info is None:
+        log(f"ERROR: Could not read media information of {abs_media_file_path}")
+        return None
+
+    audio_tracks_qty = media_info.audio_tracks
     if audio_tracks_qty == 0:
         log(f"ERROR: No audio tracks found in {abs_media_file_path}")
         return None
-    elif audio_tracks_qty > 1:
-        log(f"WARNING: Multiple audio tracks found in {abs_media_file_path} - using track {audio_track} of {audio_tracks_qty} for transcription")
-    
-    # Extract track if needed
-    if audio_track > 1:
-        log(f"Extracting track {audio_track} from {abs_media_file_path}")
-        temp_track_file = abs_media_file_path + f".track{audio_track}.wav"
-        res_track = extract_audio_track(abs_media_file_path, temp_track_file, track=audio_track)
-        if config.verbose:
-            log(f"{res_track}")
-        abs_media_file_path = temp_track_file
-
-    # Check if the media file exists
-    if not os.path.exists(abs_media_file_path):
-        log(f"Media file does not exist: {abs_media_file_path}")
+    elif audio_tracks_qty > 1 and len(audio_tracks) == 1:
+        log(f"WARNING: Multiple audio tracks found in {abs_media_file_path} - using track {audio_tracks[0]} of {audio_tracks_qty} for transcription")
+    missing = [track for track in audio_tracks if track > audio_tracks_qty]
+    if missing:
+        log(f"ERROR: Track {missing[0]} not found in {abs_media_file_path}: only {audio_tracks_qty} audio tracks")
         return None
 
-    # Check if the media file is a valid file
-    if not os.path.isfile(abs_media_file_path):
-        log(f"Media file is not a valid file: {abs_media_file_path}")
+    log(f"Decoding track {', '.join(str(track) for track in audio_tracks)} of {abs_media_file_path}")
+    try:
+        with span("extract"):
+            audios = decode_audio_tracks(abs_media_file_path, audio_tracks, sample_rate=SAMPLE_RATE)
+    except Exception as e:
+        log(f"ERROR: Decoding failed {abs_media_file_path}: {e}")
         return None
+    if config.verbose:
+        for track, audio in zip(audio_tracks, audios):
+            log(f"Decoded {len(audio) / SAMPLE_RATE:.1f}s of audio from track {track}")
+    return audios
 
-    log(f"Transcribing {abs_media_file_path}")
+_vad_lock = threading.Lock()
+_vad_totals = {'files': 0, 'total': 0.0, 'speech': 0.0}
+
+def filter_speech(config: Transcription, audio) -> tuple:
+    """
+    Keeps only the speech regions of the audio, joined end to end.
+    Returns the speech audio and a (compacted start, original start) sample offset array per region,
+    or the audio unchanged and None when no speech region is found.
+    """
+    regions = speech_regions(audio, SAMPLE_RATE, config.vad_threshold, config.vad_min_silence)
+    if not regions:
+        log("VAD: no speech region found, transcribing all audio")
+        return audio, None
+    lengths = np.array([end - start for start, end in regions])
+    offsets = np.stack([np.concatenate(([0], np.cumsum(lengths)[:-1])), [start for start, _ in regions]], axis=1)
+    speech = np.concatenate([audio[start:end] for start, end in regions])
+
+    total, kept = len(audio) / SAMPLE_RATE, len(speech) / SAMPLE_RATE
+    with _vad_lock:
+        _vad_totals['files'] += 1
+        _vad_totals['total'] += total
+        _vad_totals['speech'] += kept
+    log(f"VAD: {len(regions)} speech regions, {kept:.1f}s of {total:.1f}s kept ({1 - kept / total if total else 0:.0%} skipped)")
+    return speech, offsets
+
+def remap_transcription(result: dict, offsets) -> dict:
+    """
+    Maps the timestamps of a transcription of the speech audio back to the original timeline.
+    A start falls in the region beginning at or before it; an end in the region ending at or after it.
+    """
+    compacted = offsets[:, 0] / SAMPLE_RATE
+    shift = (offsets[:, 1] - offsets[:, 0]) / SAMPLE_RATE
+
+    def start(t: float) -> float:
+        return round(t + float(shift[max(np.searchsorted(compacted, t, side='right') - 1, 0)]), 3)
+
+    def end(t: float) -> float:
+        return round(t + float(shift[max(np.searchsorted(compacted, t, side='left') - 1, 0)]), 3)
+
+    segments = []
+    for segment in result['segments']:
+        segment = dict(segment, start=start(segment['start']), end=end(segment['end']))
+        if 'seek' in segment:
+            # Whisper seeks in mel frames of 10 ms
+            segment['seek'] = round(start(segment['seek'] / 100) * 100)
+        if 'words' in segment:
+            segment['words'] = [dict(word, start=start(word['start']), end=end(word['end'])) for word in segment['words']]
+        segments.append(segment)
+    return dict(result, segments=segments)
+
+def vad_stats() -> dict:
+    """
+    Returns how much audio the VAD kept in this process: files, total and speech seconds.
+    """
+    with _vad_lock:
+        return dict(_vad_totals)
+
+def log_vad_stats(snapshots: list):
+    """
+    Logs the VAD totals of one or more processes.
+    """
+    files = sum(snapshot['files'] for snapshot in snapshots)
+    total = sum(snapshot['total'] for snapshot in snapshots)
+    speech = sum(snapshot['speech'] for snapshot in snapshots)
+    if files:
+        log(f"VAD: {speech:.1f}s of speech in {total:.1f}s of audio across {files} files ({1 - speech / total if total else 0:.0%} skipped)")
+
+def run_transcription(config: Transcription, media_file_path: str, audio, cache_key: str = None) -> tuple[str, str]:
+    """
+    Transcribes decoded audio on the warm Whisper model and stores the result in the cache.
+    With VAD, only the speech regions are transcribed.
+    With a chunk length, long audio is split into chunks transcribed in parallel.
+    """
+    log(f"Transcribing {media_file_path}")
+
+    offsets = None
+    if config.vad:
+        with span("vad"):
+            audio, offsets = filter_speech(config, audio)
 
     if config.verbose:
         log("⏺️ Start ⏺️")
     try:
-        result: tuple[str, str] = config.model.transcribe(
-            audio=abs_media_file_path,
-            task="transcribe",
-            language=config.sourcelanguage,
-            verbose=config.verbose,
-            word_timestamps=True,
-            beam_size=config.beam_size,
-            best_of=config.best_of,
-            temperature=config.temperature,
-            prompt=config.prompt
-        )
+        with span("whisper"):
+            if config.chunk_length:
+                result: tuple[str, str] = transcribe_chunked(config, audio)
+            else:
+                result: tuple[str, str] = transcribe_audio(config, audio)
     except Exception as e:
-        log(f"ERROR: Transcription failed {abs_media_file_path}: {e}")
+        log(f"ERROR: Transcription failed {media_file_path}: {e}")
         return None
     finally:
         if config.verbose:
             log("⏺️ End ⏺️")
-        # Remove temp track file if it was created
-        if temp_track_file and os.path.exists(temp_track_file):
-            os.remove(temp_track_file)
-        return result
+    if result is None:
+        return None
+    if offsets is not None:
+        result = remap_transcription(result, offsets)
+
+    if cache_key is not None:
+        get_transcription_cache(config.cache_dir, config.cache_size * 1024 * 1024).put(cache_key, result)
+    return result
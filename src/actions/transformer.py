@@ -1,6 +1,6 @@
 from utils import log
-from models import Transcription
-from formatters import segments2lrc, segments2srt, segments2vtt, segments2json, segments2txt
+from models import Transcription, Transcript
+from formatters import segments2lrc, segments2srt, segments2vtt, segments2json, segments2ndjson, segments2txt
 
 def transform_media(config : Transcription, transcription: tuple[str, str], text_type: str) -> dict:
     
@@ -30,24 +30,30 @@ def transform_media(config : Transcription, transcription: tuple[str, str], text
         else: jobTransformation.append('segments')
 
     for job in jobTransformation:
-      transformed_content : str = None
-      match config.targettype:
-          case 'lrc':
-              transformed_content = segments2lrc(transcription[job])
-          case 'txt':
-              transformed_content = segments2txt(transcription[job])
-          case 'srt':
-              transformed_content = segments2srt(transcription[job])
-          case 'vtt':
-              transformed_content = segments2vtt(transcription[job])
-          case 'json':
-              transformed_content = segments2json(transcription[job])
-      if transformed_content is not None:
-        text_tag = 'translation' if job == 'translations' else 'transcription'
-        workTransformation[text_tag] = transformed_content
-      else:
-          log(f"ERROR: Transcription could not be converted to {config.targettype}: no segments found")
-          return None
+      text_tag = 'translation' if job == 'translations' else 'transcription'
+      workTransformation[text_tag] = {}
+      # Flatten the segments once for every format
+      transcript = Transcript.from_segments(transcription[job])
+      # Fan one transcription/translation out to every requested format;
+      # the formatters are generators, consumed block by block when the target is written
+      for targettype in config.targettype:
+          match targettype:
+              case 'lrc':
+                  transformed_content = segments2lrc(transcript)
+              case 'txt':
+                  transformed_content = segments2txt(transcript)
+              case 'srt':
+                  transformed_content = segments2srt(transcript)
+              case 'vtt':
+                  transformed_content = segments2vtt(transcript)
+              case 'json':
+                  transformed_content = segments2json(transcript, words=config.json_words)
+              case 'ndjson':
+                  transformed_content = segments2ndjson(transcript, words=config.json_words)
+              case _:
+                  log(f"ERROR: Transcription could not be converted to {targettype}: unknown target type")
+                  return None
+          workTransformation[text_tag][targettype] = transformed_content
 
-    log(f"Transcription converted to {config.targettype} completed")
+    log(f"Transcription converted to {', '.join(config.targettype)} completed")
     return workTransformation
\ No newline at end of file
@@ -1,4 +1,4 @@
-from utils import log
+from utils import log, span
 from models import Transcription
 from providers import translate_text_offline
 
@@ -20,7 +20,8 @@ def translate_media(config : Transcription, text_original: tuple[str, str]) -> t
 
     # Perform translation
     log("Starting translation...")
-    translated_text =  translate_text_offline(config, marianmt_model, text_original)
+    with span("marianmt"):
+        translated_text =  translate_text_offline(config, marianmt_model, text_original)
 
     if translated_text is None:
         log(f"Translation failed from {config.sourcelanguage} to {config.targetlanguage}")
@@ -0,0 +1,4 @@
+from .transcriptions import TranscriptionCache, get_transcription_cache, opened_transcription_caches, transcription_key, hash_file
+from .translations import TranslationMemory, get_translation_memory, opened_translation_memories, normalize_text
+from .media_index import MediaIndex, get_media_index, media_index_for, opened_media_indexes, close_media_indexes
+from .stats import merge_stats, log_cache_stats
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from utils import log, probe_media, span
+from models import MediaInfo, Transcription
+from .stats import merge_stats, log_cache_stats
+
+class MediaIndex:
+    """
+    Persistent index of media metadata, keyed by path, size and modification time.
+    Each file is probed with ffprobe at most once while it stays unchanged.
+    prefetch() probes a whole media list on a thread pool in the background.
+    Without db_path the index lives in memory only.
+    """
+
+    def __init__(self, db_path: str = None, workers: int = 4):
+        self.db_path = os.path.abspath(os.path.expanduser(db_path)) if db_path else ":memory:"
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._futures = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        if db_path:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS media (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    info TEXT NOT NULL
+                )""")
+
+    def get(self, path: str) -> MediaInfo:
+        """
+        Returns the metadata of a media file, waiting for its prefetch if one is running.
+        Returns None if the file cannot be probed.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            future = self._futures.pop(path, None)
+        if future is not None:
+            return future.result()
+        return self._lookup_or_probe(path)
+
+    def peek(self, path: str) -> MediaInfo:
+        """
+        Returns the metadata of a media file only if it is already known, without probing or waiting.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            future = self._futures.get(path)
+        if future is not None:
+            return future.result() if future.done() else None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self._lookup(path, st)
+
+    def prefetch(self, paths: list):
+        """
+        Starts probing the given media files on a thread pool; get() picks up the results.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="probe")
+            for path in paths:
+                path = os.path.abspath(path)
+                if path not in self._futures:
+                    self._futures[path] = self._executor.submit(self._lookup_or_probe, path)
+
+    def _lookup(self, path: str, st: os.stat_result) -> MediaInfo:
+        with self._lock:
+            row = self._conn.execute("SELECT info FROM media WHERE path = ? AND size = ? AND mtime = ?",
+                                     (path, st.st_size, st.st_mtime)).fetchone()
+        return MediaInfo(**json.loads(row[0])) if row else None
+
+    def _lookup_or_probe(self, path: str) -> MediaInfo:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            log(f"ERROR: Cannot read media file {path}: {e}")
+            return None
+
+        info = self._lookup(path, st)
+        if info is not None:
+            with self._lock:
+                self.hits += 1
+            return info
+
+        try:
+            with span("probe", path):
+                info = probe_media(path)
+        except Exception as e:
+            log(f"ERROR: Probe failed {path}: {e}")
+            return None
+        with self._lock:
+            self.misses += 1
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO media (path, size, mtime, info) VALUES (?, ?, ?, ?)",
+                                   (path, st.st_size, st.st_mtime, json.dumps(asdict(info))))
+        return info
+
+    def close(self):
+        """
+        Stops the prefetch thread pool, dropping the probes not started yet.
+        The index stays usable: a later prefetch() starts a new pool.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._futures.clear()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return merge_stats([{'hits': self.hits, 'misses': self.misses}])
+
+    def log_stats(self):
+        log_cache_stats("Media index", self.stats())
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_media_index(db_path: str = None, workers: int = 4) -> MediaIndex:
+    """
+    Returns the process-wide media index for db_path, opening it on first use.
+    """
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = MediaIndex(db_path, workers)
+            _indexes[db_path] = index
+        return index
+
+def media_index_for(config: Transcription) -> MediaIndex:
+    """
+    Returns the media index selected by the configuration (in memory only if the persistent index is disabled).
+    """
+    return get_media_index(config.media_index_path if config.media_index else None, config.probe_workers)
+
+def opened_media_indexes() -> list:
+    """
+    Returns the MediaIndex instances opened in this process.
+    """
+    with _indexes_lock:
+        return list(_indexes.values())
+
+def close_media_indexes():
+    """
+    Stops the prefetch thread pools of the MediaIndex instances opened in this process.
+    """
+    for index in opened_media_indexes():
+        index.close()
\ No newline at end of file
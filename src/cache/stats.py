@@ -0,0 +1,16 @@
+from utils import log
+
+def merge_stats(stats_list: list) -> dict:
+    """
+    Sums hit/miss/eviction counters of several caches (e.g. one per worker process).
+    """
+    merged = {'hits': 0, 'misses': 0, 'evictions': 0}
+    for stats in stats_list:
+        for counter in merged:
+            merged[counter] += stats.get(counter, 0)
+    lookups = merged['hits'] + merged['misses']
+    merged['hit_rate'] = merged['hits'] / lookups if lookups else 0.0
+    return merged
+
+def log_cache_stats(name: str, stats: dict):
+    log(f"{name}: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), {stats['evictions']} evictions")
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+from utils import log
+from .stats import merge_stats, log_cache_stats
+
+class TranscriptionCache:
+    """
+    Content-addressed on-disk cache of raw Whisper transcription results.
+    Entries are JSON files named by key; the least recently used ones are evicted
+    once the cache grows past max_bytes. The size of the cache is scanned once and then
+    tracked as entries are stored, so the directory is only walked again to evict.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> dict:
+        """
+        Returns the cached result for key, or None on a miss.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # Refresh the entry so it is evicted last
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict):
+        """
+        Stores a result under key and evicts old entries if the cache is over its size cap.
+        """
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, default=float)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            log(f"WARNING: Could not store transcription in cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += size - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan(self) -> tuple[list, int]:
+        """
+        Returns the (mtime, size, path) of every entry and their total size.
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(".json"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, file))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, os.path.join(root, file)))
+                total += st.st_size
+        return entries, total
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        The directory is walked, so entries stored by other processes are counted too.
+        """
+        entries, total = self._scan()
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+        with self._lock:
+            self._size = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            return merge_stats([{'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}])
+
+    def log_stats(self):
+        log_cache_stats("Transcription cache", self.stats())
+
+def hash_file(path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def transcription_key(content_hash: str, model_name: str, track: int, params: dict) -> str:
+    """
+    Builds the cache key of a transcription from the audio content hash,
+    the model, the audio track and the decoding parameters.
+    """
+    material = json.dumps({
+        'content': content_hash,
+        'model': model_name,
+        'track': track,
+        'params': params
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_transcription_cache(cache_dir: str, max_bytes: int) -> TranscriptionCache:
+    """
+    Returns the process-wide cache for cache_dir, creating it on first use.
+    """
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = TranscriptionCache(cache_dir, max_bytes)
+            _caches[cache_dir] = cache
+        return cache
+
+def opened_transcription_caches() -> list:
+    """
+    Returns the TranscriptionCache instances opened in this process.
+    """
+    with _caches_lock:
+        return list(_caches.values())
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+import time
+from .stats import merge_stats, log_cache_stats
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes a source segment so that whitespace variations share one memo entry.
+    """
+    return " ".join(text.split())
+
+class TranslationMemory:
+    """
+    Persistent segment-level translation memo stored in a local SQLite file.
+    Entries are keyed by (MarianMT model name, normalized source text); the least
+    recently used ones are evicted once the memo holds more than max_entries.
+    """
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.db_path = os.path.abspath(os.path.expanduser(db_path))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS memo (
+                    model TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, source)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS memo_last_used ON memo (last_used)")
+
+    def lookup(self, model_name: str, texts: list) -> dict:
+        """
+        Returns a dict of normalized source text -> translation for the texts found in the memo.
+        """
+        sources = list(dict.fromkeys(normalize_text(text) for text in texts))
+        found = {}
+        with self._lock:
+            for i in range(0, len(sources), 500):
+                chunk = sources[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT source, target FROM memo WHERE model = ? AND source IN ({placeholders})",
+                    [model_name] + chunk).fetchall()
+                found.update(rows)
+            if found:
+                with self._conn:
+                    now = time.time()
+                    self._conn.executemany("UPDATE memo SET last_used = ? WHERE model = ? AND source = ?",
+                                           [(now, model_name, source) for source in found])
+            self.hits += len(found)
+            self.misses += len(sources) - len(found)
+        return found
+
+    def store(self, model_name: str, translations: dict):
+        """
+        Stores normalized source text -> translation pairs and evicts old entries over the cap.
+        """
+        if not translations:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO memo (model, source, target, last_used) VALUES (?, ?, ?, ?)",
+                                   [(model_name, source, target, now) for source, target in translations.items()])
+            count = self._conn.execute("SELECT COUNT(*) FROM memo").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute("DELETE FROM memo WHERE rowid IN (SELECT rowid FROM memo ORDER BY last_used LIMIT ?)", (excess,))
+                self.evictions += excess
+
+    def stats(self) -> dict:
+        with self._lock:
+            return merge_stats([{'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}])
+
+    def log_stats(self):
+        log_cache_stats("Translation memory", self.stats())
+
+_memories = {}
+_memories_lock = threading.Lock()
+
+def get_translation_memory(db_path: str, max_entries: int) -> TranslationMemory:
+    """
+    Returns the process-wide translation memory for db_path, opening it on first use.
+    """
+    with _memories_lock:
+        memory = _memories.get(db_path)
+        if memory is None:
+            memory = TranslationMemory(db_path, max_entries)
+            _memories[db_path] = memory
+        return memory
+
+def opened_translation_memories() -> list:
+    """
+    Returns the TranslationMemory instances opened in this process.
+    """
+    with _memories_lock:
+        return list(_memories.values())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import shlex
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+def request(url: str, data: bytes = None, headers: dict = None, timeout: float = None) -> tuple[int, dict]:
+    """
+    Sends a request to the transcription service and returns the status and decoded JSON answer.
+    """
+    req = urllib.request.Request(url, data=data, headers=headers or {}, method="POST" if data is not None else "GET")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Minimal client of the takigrapher transcription service",
+        usage="python3 client.py [--url URL] [--upload] [--metrics] [MEDIA] [-- transcription options]",
+        prog="client.py"
+    )
+    parser.add_argument("--url", dest="url", action="store", type=str,
+                        help="address of the service. (Default: http://127.0.0.1:8765)", default="http://127.0.0.1:8765")
+    parser.add_argument("--upload", dest="upload", action="store_true",
+                        help="send the media file itself instead of its path (for a service on another machine or container)", default=False)
+    parser.add_argument("--metrics", dest="metrics", action="store_true",
+                        help="print the service metrics and exit", default=False)
+    parser.add_argument("--output", dest="output", metavar="DIR", action="store", type=str,
+                        help="write the outputs next to the media file name in DIR instead of printing the answer", default=None)
+    parser.add_argument("media", metavar="MEDIA", nargs="?", help="media file to transcribe")
+    argv = sys.argv[1:]
+    options = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+
+    if args.metrics:
+        status, answer = request(f"{args.url}/metrics")
+    elif args.media is None:
+        parser.error("a media file is required")
+    elif args.upload:
+        query = urllib.parse.urlencode({'filename': os.path.basename(args.media), 'args': shlex.join(options)})
+        with open(args.media, 'rb') as f:
+            status, answer = request(f"{args.url}/transcribe?{query}", f.read(), {'Content-Type': 'application/octet-stream'})
+    else:
+        body = json.dumps({'media': os.path.abspath(args.media), 'args': options}).encode("utf-8")
+        status, answer = request(f"{args.url}/transcribe", body, {'Content-Type': 'application/json'})
+
+    if status == 200 and args.output and 'tracks' in answer:
+        base = os.path.splitext(os.path.basename(args.media))[0]
+        for track in answer['tracks']:
+            for kind, formats in track['outputs'].items():
+                for targettype, content in formats.items():
+                    path = os.path.join(args.output, f"{base}.{track['language']}.{kind}.track{track['track']}.{targettype}")
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                    print(path)
+    else:
+        print(json.dumps(answer, indent=2, ensure_ascii=False))
+    sys.exit(0 if status == 200 else 1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .json import segments2json
+from .json import segments2json, segments2ndjson
 from .lrc import segments2lrc
 from .srt import segments2srt
 from .txt import segments2txt
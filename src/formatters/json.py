@@ -1,37 +1,141 @@
 import json
+import numpy as np
 from decimal import Decimal, ROUND_DOWN
+from json.encoder import encode_basestring
+from models import Transcript
+
+def truncate_millis(number: float) -> int:
+    """
+    Truncate seconds to whole milliseconds without rounding, as an integer.
+    The digits are cut from the shortest repr of the float, so 1.005 gives 1005 where
+    int(1.005 * 1000) gives 1004.
+    """
+    text = repr(float(number))
+    whole, _, fraction = text.partition('.')
+    if 'e' in text or not fraction.isdigit():
+        # Exponent notation (very small or large numbers): fall back to Decimal
+        return int(Decimal(text).quantize(Decimal('0.001'), rounding=ROUND_DOWN).scaleb(3))
+    millis = abs(int(whole)) * 1000 + int((fraction + '00')[:3])
+    return -millis if text[0] == '-' else millis
 
 def truncate_float(number: float, decimal_places: int = 3) -> float:
     """
-    Truncate float to specified decimal places without rounding.
+    Truncate float to 3 decimal places without rounding, as quantizing Decimal(str(number)) would.
+    """
+    # millis / 1000 is the float nearest to the truncated decimal, as Decimal would give
+    seconds = abs(truncate_millis(number)) / 1000
+    return -seconds if str(number)[0] == '-' else seconds
+
+def truncated_millis(seconds: np.ndarray) -> np.ndarray:
+    """
+    Truncates an array of seconds (without NaN) to integer milliseconds, like truncate_millis.
+    seconds * 1000 can only truncate differently from the repr of a time within rounding error
+    of a whole millisecond m. There the repr is on the same side of m / 1000 as the time is of
+    the float nearest to m / 1000, which settles it without formatting anything.
     """
-    # Convert to Decimal for precise truncation
-    decimal_number = Decimal(str(number))
-    return float(decimal_number.quantize(Decimal('0.001'), rounding=ROUND_DOWN))
+    magnitude = np.abs(seconds)
+    scaled = magnitude * 1000
+    nearest = np.rint(scaled)
+    near = np.abs(scaled - nearest) <= 1e-6 * np.maximum(1.0, nearest)
+    millis = np.where(near, np.where(magnitude >= nearest / 1000, nearest, nearest - 1), np.trunc(scaled))
+    return np.copysign(millis, seconds).astype(np.int64)
 
-def segments2json(segments, text_tag: str = 'text') -> str:
+def truncate_floats(seconds: np.ndarray) -> np.ndarray:
     """
-    Converts Whisper segments to a serialized JSON string.
+    Truncates an array of seconds (without NaN) to 3 decimal places, like truncate_float.
+    """
+    return np.copysign(np.abs(truncated_millis(seconds)) / 1000, seconds)
+
+def segment_words(transcript: Transcript, first: int, last: int, convert) -> list:
+    """
+    Returns the non-empty words of the segments first to last, per segment, as
+    (start, end, word) with times converted by convert (None where Whisper gave none).
+    """
+    word_index = transcript.word_index[first:last + 1].tolist()
+    base = word_index[0]
+    word_texts = transcript.word_texts(base, word_index[-1])
+    times = []
+    for values in (transcript.word_start[base:word_index[-1]], transcript.word_end[base:word_index[-1]]):
+        missing = np.isnan(values)
+        converted = convert(np.where(missing, 0.0, values))
+        times.append([None if gap else time for gap, time in zip(missing.tolist(), converted.tolist())])
+    word_starts, word_ends = times
+    return [[(word_starts[k - base], word_ends[k - base], word_texts[k - base])
+             for k in range(word_index[i], word_index[i + 1]) if word_texts[k - base]]
+            for i in range(last - first)]
+
+def segments2json(segments, text_tag: str = 'text', words: bool = False):
+    """
+    Converts Whisper segments to serialized JSON, yielded in blocks.
     Each object in the JSON contains 'start', 'end', and 'text'.
     Time values are truncated to 3 decimal places without rounding.
 
     Args:
-        segments: List of Whisper segments, each with 'start', 'end', 'text'.
+        segments: Transcript, or list of Whisper segments, each with 'start', 'end', 'text'.
+        text_tag: Key to access text content in segments.
+        words: Add the 'words' of each segment, with their 'start', 'end' and 'word'.
+
+    Yields:
+        Blocks of the JSON array with truncated time values, laid out as json.dumps(indent=2) would.
+    """
+    transcript = Transcript.of(segments, text_tag)
+    separator = '[\n'
+    for first, last in transcript.batches():
+        json_content = []
+        starts, ends = transcript.segment_start[first:last], transcript.segment_end[first:last]
+        starts = truncate_floats(np.where(np.isnan(starts), 0.0, starts))
+        # A missing end is one second after the truncated start, truncated again
+        ends = truncate_floats(np.where(np.isnan(ends), starts + 1.0, ends))
+        batch_words = segment_words(transcript, first, last, truncate_floats) if words else None
+        for i, (text, start_time, end_time) in enumerate(zip(transcript.segment_texts(first, last), starts.tolist(), ends.tolist())):
+            if text:
+                json_content.append({
+                    "start": start_time,
+                    "end": end_time,
+                    "text": text
+                })
+                if words:
+                    json_content[-1]["words"] = [{"start": word_start, "end": word_end, "word": word}
+                                                 for word_start, word_end, word in batch_words[i]]
+        if json_content:
+            # The objects of the batch without the brackets of their own array
+            yield separator + json.dumps(json_content, ensure_ascii=False, indent=2)[2:-2]
+            separator = ',\n'
+
+    yield '[]' if separator == '[\n' else '\n]'
+
+def segments2ndjson(segments, text_tag: str = 'text', words: bool = False):
+    """
+    Converts Whisper segments to newline-delimited JSON, one compact object per segment,
+    so indexers can parse the output as it streams. Times are integer milliseconds,
+    truncated like segments2json: {"start_ms":500,"end_ms":1199,"text":"..."}.
+
+    Args:
+        segments: Transcript, or list of Whisper segments, each with 'start', 'end', 'text'.
         text_tag: Key to access text content in segments.
+        words: Add the 'words' of each segment, with their 'start_ms', 'end_ms' and 'word'
+            (null times where Whisper gave none).
 
-    Returns:
-        String containing the serialized JSON with truncated time values.
-    """
-    json_content = []
-    for segment in segments:
-        if segment.get(text_tag, '').strip():
-            start_time = truncate_float(segment.get('start', 0.0))
-            end_time = truncate_float(segment.get('end', start_time + 1.0))
-            text = segment[text_tag].strip()
-            json_content.append({
-                "start": start_time,
-                "end": end_time,
-                "text": text
-            })
-
-    return json.dumps(json_content, ensure_ascii=False, indent=2)
+    Yields:
+        Blocks of NDJSON lines.
+    """
+    transcript = Transcript.of(segments, text_tag)
+    for first, last in transcript.batches():
+        lines = []
+        starts, ends = transcript.segment_start[first:last], transcript.segment_end[first:last]
+        starts = truncated_millis(np.where(np.isnan(starts), 0.0, starts))
+        missing = np.isnan(ends)
+        ends = np.where(missing, starts + 1000, truncated_millis(np.where(missing, 0.0, ends)))
+        batch_words = segment_words(transcript, first, last, truncated_millis) if words else None
+        for i, (text, start_ms, end_ms) in enumerate(zip(transcript.segment_texts(first, last), starts.tolist(), ends.tolist())):
+            if not text:
+                continue
+            line = f'{{"start_ms":{start_ms},"end_ms":{end_ms},"text":{encode_basestring(text)}'
+            if words:
+                line += ',"words":[' + ','.join(
+                    f'{{"start_ms":{"null" if word_start is None else word_start},'
+                    f'"end_ms":{"null" if word_end is None else word_end},"word":{encode_basestring(word)}}}'
+                    for word_start, word_end, word in batch_words[i]) + ']'
+            lines.append(line + '}\n')
+        if lines:
+            yield ''.join(lines)
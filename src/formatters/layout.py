@@ -0,0 +1,213 @@
+from bisect import bisect_left, bisect_right
+from models import Transcript
+
+# Cue and line breaks are preferred after these endings and after pauses
+SENTENCE_END = ('.', '?', '!', '…', '。', '？', '！')
+CLAUSE_END = (',', ';', ':', '、', '，')
+PAUSE = 0.5
+
+def segment_tokens(text: str, start: float, end: float, words: list) -> tuple[list, list, list]:
+    """
+    Returns the texts, start and end times of the tokens of a segment: its words, with empty
+    words dropped, hyphenated words joined ("post" and "-catrina" become "post-catrina") and
+    missing times filled from the previous word; or, without words, the words of its text with
+    times spread over the segment by character count.
+    """
+    start = 0.0 if start != start else start
+    texts, starts, ends = [], [], []
+    if words:
+        previous_end = start
+        for word, word_start, word_end in words:
+            if not word:
+                continue
+            word_start = previous_end if word_start != word_start else word_start
+            word_end = word_start if word_end != word_end else word_end
+            if texts and word.startswith('-'):
+                texts[-1] += word
+                ends[-1] = word_end
+            else:
+                texts.append(word)
+                starts.append(word_start)
+                ends.append(word_end)
+            previous_end = word_end
+        return texts, starts, ends
+
+    texts = text.split()
+    end = start + 1.0 if end != end else end
+    total = sum(len(token) + 1 for token in texts)
+    position = 0
+    for token in texts:
+        starts.append(start + (end - start) * position / total)
+        position += len(token) + 1
+        ends.append(start + (end - start) * (position - 1) / total)
+    return texts, starts, ends
+
+def prefix_widths(texts: list) -> list:
+    """
+    Returns P with P[k] = width of the first k tokens plus one space after each, so that
+    tokens i to j fit on a line of width P[j] - P[i] - 1.
+    """
+    widths = [0]
+    for text in texts:
+        widths.append(widths[-1] + len(text) + 1)
+    return widths
+
+def lines_needed(widths: list, i: int, j: int, max_chars: int) -> int:
+    """
+    Returns the fewest lines of max_chars that tokens i to j fit on, filling lines greedily
+    (a token longer than max_chars takes a line of its own).
+    """
+    lines = 0
+    while i < j:
+        i = max(i + 1, min(j, bisect_right(widths, widths[i] + max_chars + 1) - 1))
+        lines += 1
+    return lines
+
+def break_bonus(texts: list, starts: list, ends: list, k: int) -> float:
+    """
+    Returns how good a break after token k is: after a sentence, a clause or a pause.
+    """
+    bonus = 0.0
+    if texts[k].endswith(SENTENCE_END):
+        bonus += 0.5
+    elif texts[k].endswith(CLAUSE_END):
+        bonus += 0.25
+    if k + 1 < len(texts):
+        bonus += 0.3 * min(1.0, max(0.0, starts[k + 1] - ends[k]) / PAUSE)
+    return bonus
+
+def break_cues(texts: list, starts: list, ends: list, max_chars: int, max_lines: int, min_duration: float, max_duration: float) -> list:
+    """
+    Splits tokens into cues of at most max_lines lines of max_chars and at most max_duration
+    seconds (a single token may exceed both), minimizing a cost per cue: a fixed cost, the
+    unused room, too short a duration and a break away from sentences, clauses and pauses.
+    best[j] is the cheapest layout of the first j tokens; the cues ending at j that fit are
+    a window of bounded width found with the prefix widths, so the whole run is linear.
+    Returns the (first, last) token ranges of the cues.
+    """
+    n = len(texts)
+    widths = prefix_widths(texts)
+    capacity = max_lines * (max_chars + 1) - 1
+    bonus = [break_bonus(texts, starts, ends, k) for k in range(n)]
+    best = [0.0] + [float('inf')] * n
+    back = [0] * (n + 1)
+    for j in range(1, n + 1):
+        lowest = bisect_left(widths, widths[j] - capacity - 1)
+        for i in range(j - 1, min(lowest, j - 1) - 1, -1):
+            duration = ends[j - 1] - starts[i]
+            if j - i > 1 and (duration > max_duration or lines_needed(widths, i, j, max_chars) > max_lines):
+                # Earlier starts are only longer and wider
+                break
+            room = 1.0 - min(1.0, (widths[j] - widths[i] - 1) / capacity)
+            cost = 1.0 + room * room - (bonus[j - 1] if j < n else 0.0)
+            if duration < min_duration:
+                cost += ((min_duration - duration) / min_duration) ** 2
+            if best[i] + cost < best[j]:
+                best[j] = best[i] + cost
+                back[j] = i
+
+    cues = []
+    j = n
+    while j > 0:
+        cues.append((back[j], j))
+        j = back[j]
+    return cues[::-1]
+
+def break_lines(texts: list, widths: list, i: int, j: int, max_chars: int, max_lines: int) -> list:
+    """
+    Splits the tokens i to j of a cue into the fewest lines of max_chars, as balanced as
+    possible (smallest sum of squared line widths). Cues are short, so this is constant time.
+    """
+    lines = min(lines_needed(widths, i, j, max_chars), max_lines)
+    if lines <= 1:
+        return [' '.join(texts[i:j])]
+
+    # cost[l][k]: best layout of tokens k to j on l lines
+    inf = float('inf')
+    cost = [[inf] * (j + 1) for _ in range(lines + 1)]
+    split = [[j] * (j + 1) for _ in range(lines + 1)]
+    cost[0][j] = 0.0
+    for line in range(1, lines + 1):
+        for k in range(j - 1, i - 1, -1):
+            for end in range(k + 1, j + 1):
+                width = widths[end] - widths[k] - 1
+                if width > max_chars and end > k + 1:
+                    break
+                if cost[line - 1][end] + width * width < cost[line][k]:
+                    cost[line][k] = cost[line - 1][end] + width * width
+                    split[line][k] = end
+
+    result, k = [], i
+    for line in range(lines, 0, -1):
+        end = split[line][k]
+        result.append(' '.join(texts[k:end]))
+        k = end
+        if k >= j:
+            break
+    return result
+
+def layout_cues(transcript: Transcript, first: int, last: int, max_chars: int = 40, max_lines: int = 2,
+                min_duration: float = 0.7, max_duration: float = 5.0) -> list:
+    """
+    Lays out the segments first to last as subtitle cues, breaking every segment into cues
+    and lines with break_cues and break_lines.
+    Returns (start, end, lines) per cue, with the times of their first and last tokens.
+    """
+    word_index = transcript.word_index[first:last + 1].tolist()
+    word_texts = transcript.word_texts(word_index[0], word_index[-1])
+    word_starts = transcript.word_start[word_index[0]:word_index[-1]].tolist()
+    word_ends = transcript.word_end[word_index[0]:word_index[-1]].tolist()
+    base = word_index[0]
+    segments = zip(transcript.segment_texts(first, last), transcript.segment_start[first:last].tolist(), transcript.segment_end[first:last].tolist())
+
+    cues = []
+    for i, (text, start, end) in enumerate(segments):
+        words = [(word_texts[k - base], word_starts[k - base], word_ends[k - base]) for k in range(word_index[i], word_index[i + 1])]
+        texts, starts, ends = segment_tokens(text, start, end, words)
+        if not texts:
+            continue
+        widths = prefix_widths(texts)
+        for cue_first, cue_last in break_cues(texts, starts, ends, max_chars, max_lines, min_duration, max_duration):
+            cues.append((starts[cue_first], ends[cue_last - 1], break_lines(texts, widths, cue_first, cue_last, max_chars, max_lines)))
+    return cues
+
+def iter_cues(transcript: Transcript, max_chars: int = 40, max_lines: int = 2, min_duration: float = 0.7,
+              max_duration: float = 5.0, min_gap: float = 0.01):
+    """
+    Yields the cues of a transcript in batches, as lists of (start, end, lines).
+    Cues never overlap (a cue starts min_gap after the previous one ends) and short cues are
+    held on screen up to min_duration, without running into the next cue.
+    """
+    previous_end = None
+    pending = None
+    for first, last in transcript.batches():
+        cues = layout_cues(transcript, first, last, max_chars, max_lines, min_duration, max_duration)
+        if pending is not None:
+            cues.insert(0, pending)
+        if not cues:
+            continue
+
+        # The last cue waits for the start of the next one
+        timed = []
+        for k, (start, end, lines) in enumerate(cues[:-1]):
+            start, end = cue_times(start, end, previous_end, cues[k + 1][0], min_duration, min_gap)
+            timed.append((start, end, lines))
+            previous_end = end
+        pending = cues[-1]
+        if timed:
+            yield timed
+
+    if pending is not None:
+        start, end = cue_times(pending[0], pending[1], previous_end, None, min_duration, min_gap)
+        yield [(start, end, pending[2])]
+
+def cue_times(start: float, end: float, previous_end: float, next_start: float, min_duration: float, min_gap: float) -> tuple[float, float]:
+    """
+    Returns the start and end of a cue after its neighbours.
+    """
+    if previous_end is not None and start < previous_end + min_gap:
+        start = previous_end + min_gap
+    end = max(end, start + min_duration)
+    if next_start is not None and end > next_start - min_gap:
+        end = max(next_start - min_gap, start + min_gap)
+    return start, end
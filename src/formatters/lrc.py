@@ -1,6 +1,10 @@
+from math import isnan
+import numpy as np
+from models import Transcript
+
 def format_time_lrc(seconds: float) -> str:
     """Converts seconds to LRC format [mm:ss.xx]"""
-    if seconds is None:
+    if seconds is None or isnan(seconds):
         return "[00:00.00]"
     minutes = int(seconds / 60)
     remaining_seconds = seconds % 60
@@ -8,6 +12,17 @@ def format_time_lrc(seconds: float) -> str:
     centiseconds = int((remaining_seconds - secs) * 100)
     return f"[{minutes:02d}:{secs:02d}.{centiseconds:02d}]"
 
+def format_times_lrc(seconds: np.ndarray) -> list:
+    """Converts an array of seconds to LRC format [mm:ss.xx], like format_time_lrc"""
+    missing = np.isnan(seconds)
+    seconds = np.where(missing, 0.0, seconds)
+    minutes = np.trunc(seconds / 60)
+    remaining_seconds = np.mod(seconds, 60)
+    secs = np.trunc(remaining_seconds)
+    centiseconds = np.trunc((remaining_seconds - secs) * 100)
+    minutes, secs, centiseconds = (np.where(missing, 0, value).astype(np.int64).tolist() for value in (minutes, secs, centiseconds))
+    return [f"[{m:02d}:{s:02d}.{cs:02d}]" for m, s, cs in zip(minutes, secs, centiseconds)]
+
 def join_hyphenated_words(words):
     """
     Join words that should be hyphenated.
@@ -25,37 +40,49 @@ def join_hyphenated_words(words):
             i += 1
     return result
 
-def segments2lrc(segments, text_tag: str = 'text') -> str:
+def segments2lrc(segments, text_tag: str = 'text'):
+    """
+    Build LRC content from Whisper segments (a Transcript or a list of segments).
+    Yields blocks of LRC lines.
+    """
+    transcript = Transcript.of(segments, text_tag)
+    for first, last in transcript.batches():
+        yield lrc_lines(transcript, first, last)
+
+def lrc_lines(transcript: Transcript, first: int, last: int) -> str:
     """
-    Build LRC content lines from Whisper segments.
-    Returns a list of LRC lines.
+    Build the LRC lines of the segments first to last.
     """
     PAUSE_THRESHOLD = 0.25  # Shorter pause for more line breaks
     MAX_WORDS_PER_LINE = 7  # Maximum words per line
-    lrc_content = []
+    word_index = transcript.word_index[first:last + 1].tolist()
+    word_texts = transcript.word_texts(word_index[0], word_index[-1])
+    word_starts = transcript.word_start[word_index[0]:word_index[-1]].tolist()
+    word_ends = transcript.word_end[word_index[0]:word_index[-1]].tolist()
+    word_index = [index - word_index[0] for index in word_index]
+    # Line start times and texts; the times are formatted together at the end
+    line_times, line_texts = [], []
     
-    for segment in segments:
-        if not segment.get('words'):
-            if segment.get('text', '').strip():
-                start_time = segment['start']
-                text = segment['text'].strip()
-                lrc_line = f"{format_time_lrc(start_time)}{text}"
-                lrc_content.append(f"{lrc_line}\n")
+    for i, (text, start_time) in enumerate(zip(transcript.segment_texts(first, last), transcript.segment_start[first:last].tolist())):
+        if word_index[i] == word_index[i + 1]:
+            if text:
+                line_times.append(start_time)
+                line_texts.append(text)
             continue
 
         current_line_words = []
         current_line_start_time = None
         previous_word_end_time = None
 
-        for i, word_info in enumerate(segment['words']):
-            word_text = word_info.get('word', '').strip()
+        for j in range(word_index[i], word_index[i + 1]):
+            word_text = word_texts[j]
             if not word_text:
                 continue
 
-            word_start_time = word_info.get('start')
-            word_end_time = word_info.get('end')
+            word_start_time = word_starts[j]
+            word_end_time = word_ends[j]
 
-            if word_start_time is None or word_end_time is None:
+            if isnan(word_start_time) or isnan(word_end_time):
                 if not current_line_words:
                     continue
                 else:
@@ -71,8 +98,8 @@ def segments2lrc(segments, text_tag: str = 'text') -> str:
                     if pause_duration > PAUSE_THRESHOLD or len(current_line_words) >= MAX_WORDS_PER_LINE:
                         # Join hyphenated words before creating the line
                         joined_words = join_hyphenated_words(current_line_words)
-                        lrc_line = f"{format_time_lrc(current_line_start_time)}{' '.join(joined_words)}"
-                        lrc_content.append(f"{lrc_line}\n")
+                        line_times.append(current_line_start_time)
+                        line_texts.append(' '.join(joined_words))
                         current_line_words = [word_text]
                         current_line_start_time = word_start_time
                     else:
@@ -85,7 +112,8 @@ def segments2lrc(segments, text_tag: str = 'text') -> str:
         if current_line_words and current_line_start_time is not None:
             # Join hyphenated words before creating the final line
             joined_words = join_hyphenated_words(current_line_words)
-            lrc_line = f"{format_time_lrc(current_line_start_time)}{' '.join(joined_words)}"
-            lrc_content.append(f"{lrc_line}\n")
+            line_times.append(current_line_start_time)
+            line_texts.append(' '.join(joined_words))
 
-    return ''.join(lrc_content)
\ No newline at end of file
+    times = format_times_lrc(np.array(line_times, dtype=np.float64))
+    return ''.join(f"{time}{text}\n" for time, text in zip(times, line_texts))
\ No newline at end of file
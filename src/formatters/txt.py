@@ -1,18 +1,20 @@
-def segments2txt(segments, text_tag: str = 'text') -> str:
+from models import Transcript
+
+def segments2txt(segments, text_tag: str = 'text'):
     """
     Converts Whisper segments to plain text.
     Each segment is converted into a line of text.
 
     Args:
-        segments: List of Whisper segments, each with 'text'.
+        segments: Transcript, or list of Whisper segments, each with 'text'.
 
-    Returns:
-        String containing the transcribed text, with lines separated by line breaks.
+    Yields:
+        Blocks of the transcribed text, with lines separated by line breaks.
     """
-    txt_content = []
-
-    for segment in segments:
-        if segment.get(text_tag, '').strip():
-            txt_content.append(segment['text'].strip())
-
-    return '\n'.join(txt_content)
\ No newline at end of file
+    transcript = Transcript.of(segments, text_tag)
+    separator = ''
+    for first, last in transcript.batches():
+        lines = [text for text in transcript.segment_texts(first, last) if text]
+        if lines:
+            yield separator + '\n'.join(lines)
+            separator = '\n'
\ No newline at end of file
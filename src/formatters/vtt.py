@@ -1,33 +1,36 @@
-def format_time_vtt(seconds: float) -> str:
-    """Converts seconds to VTT time format HH:MM:SS.mmm"""
-    if seconds is None:
-        return "00:00:00.000"
-    total_seconds = int(seconds)
-    milliseconds = int((seconds - total_seconds) * 1000)
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+import numpy as np
+from models import Transcript
+from .layout import iter_cues
 
-def segments2vtt(segments, text_tag: str = 'text') -> str:
+def format_times_vtt(seconds: np.ndarray) -> list:
+    """Converts an array of seconds to VTT time format HH:MM:SS.mmm, truncating to milliseconds (NaN becomes 0)"""
+    seconds = np.where(np.isnan(seconds), 0.0, seconds)
+    total_seconds = np.trunc(seconds)
+    milliseconds = np.trunc((seconds - total_seconds) * 1000).astype(np.int64).tolist()
+    total_seconds = total_seconds.astype(np.int64)
+    hours = (total_seconds // 3600).tolist()
+    minutes = ((total_seconds % 3600) // 60).tolist()
+    secs = (total_seconds % 60).tolist()
+    return [f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}" for h, m, s, ms in zip(hours, minutes, secs, milliseconds)]
+
+def segments2vtt(segments, text_tag: str = 'text', max_chars: int = 40, max_lines: int = 2,
+                 min_duration: float = 0.7, max_duration: float = 5.0):
     """
     Build VTT content from Whisper segments.
-    Each segment is converted to a VTT block with start and end times.
+    Cues and lines are laid out by the shared subtitle layout engine, like SRT.
     
     Args:
-        segments: List of Whisper segments, each with 'start', 'end', and 'text'.
+        segments: Transcript, or list of Whisper segments, each with 'start', 'end', 'text' and 'words'.
+        max_chars, max_lines: Longest line and most lines of a cue.
+        min_duration, max_duration: Shortest and longest time a cue stays on screen, in seconds.
     
-    Returns:
-        List of VTT lines, including the header.
+    Yields:
+        Blocks of VTT content, starting with the header.
     """
-    vtt_content = ["WEBVTT\n"]
-
-    for segment in segments:
-        if segment.get(text_tag, '').strip():
-            start_time = segment.get('start', 0.0)
-            end_time = segment.get('end', start_time + 1.0)  # Default to 1 second if end is not provided
-            text = segment[text_tag].strip()
-            vtt_block = f"{format_time_vtt(start_time)} --> {format_time_vtt(end_time)}\n{text}\n"
-            vtt_content.append(f"{vtt_block}\n")
+    transcript = Transcript.of(segments, text_tag)
+    yield "WEBVTT\n\n"
 
-    return ''.join(vtt_content)
\ No newline at end of file
+    for cues in iter_cues(transcript, max_chars, max_lines, min_duration, max_duration):
+        starts = format_times_vtt(np.array([cue[0] for cue in cues], dtype=np.float64))
+        ends = format_times_vtt(np.array([cue[1] for cue in cues], dtype=np.float64))
+        yield ''.join(f"{start} --> {end}\n{chr(10).join(cue[2])}\n\n" for start, end, cue in zip(starts, ends, cues))
@@ -0,0 +1,3 @@
+from .job_queue import JobQueue
+from .watcher import MediaWatcher
+from .manifest import JobManifest, get_job_manifest, run_id
\ No newline at end of file
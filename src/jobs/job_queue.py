@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import threading
+import time
+
+class JobQueue:
+    """
+    Persistent FIFO queue of media files to process, stored in a local SQLite file.
+    A file is queued once per version (size and modification time); queuing it again
+    while it waits only refreshes its version. Files left running by a stopped process
+    are queued again when the queue is opened.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(os.path.expanduser(db_path))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS queue (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    state TEXT NOT NULL,
+                    queued REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS queue_state ON queue (state, queued)")
+            self._conn.execute("UPDATE queue SET state = 'queued' WHERE state = 'running'")
+
+    def push(self, path: str, force: bool = False) -> bool:
+        """
+        Queues a media file unless this version of it is already queued, running or done
+        (with force, a done or failed file is queued again).
+        Returns True if the file was queued.
+        """
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT size, mtime, state FROM queue WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                same = (row[0], row[1]) == (st.st_size, st.st_mtime)
+                if row[2] == 'queued':
+                    if not same:
+                        self._conn.execute("UPDATE queue SET size = ?, mtime = ? WHERE path = ?", (st.st_size, st.st_mtime, path))
+                    return False
+                if same and (row[2] == 'running' or not force):
+                    return False
+            self._conn.execute("INSERT OR REPLACE INTO queue (path, size, mtime, state, queued) VALUES (?, ?, ?, 'queued', ?)",
+                               (path, st.st_size, st.st_mtime, time.time()))
+            return True
+
+    def pop(self) -> str:
+        """
+        Marks the oldest queued file as running and returns its path, or None if nothing is queued.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT path FROM queue WHERE state = 'queued' ORDER BY queued LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE queue SET state = 'running' WHERE path = ?", row)
+            return row[0]
+
+    def finish(self, path: str, processed: bool):
+        """
+        Marks a running file as done or failed. A failed file is queued again when it changes.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE queue SET state = ? WHERE path = ?", ('done' if processed else 'failed', os.path.abspath(path)))
+
+    def done(self, path: str) -> bool:
+        """
+        Returns whether the current version of a media file was processed.
+        """
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime, state FROM queue WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[2] == 'done' and (row[0], row[1]) == (st.st_size, st.st_mtime)
+
+    def counts(self) -> dict:
+        """
+        Returns the number of files in each state.
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall())
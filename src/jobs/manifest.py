@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Timing columns, one per pipeline stage
+STAGES = ('decode', 'transcribe', 'translate', 'write')
+
+def run_id(params: dict) -> str:
+    """
+    Returns the id of the run of params.
+    """
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+class JobManifest:
+    """
+    Persistent record of batch runs, stored in a local SQLite file.
+    A run is identified by the hash of its parameters; for every media file (and track)
+    of a run the manifest keeps its state (pending, transcribed, translated, written or
+    failed), the number of attempts, the last error and the time spent in each stage.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(os.path.expanduser(db_path))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run TEXT PRIMARY KEY,
+                    params TEXT NOT NULL,
+                    started REAL NOT NULL,
+                    finished REAL,
+                    discovered INTEGER NOT NULL DEFAULT 0
+                )""")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    run TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    track INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated REAL NOT NULL,
+                    {", ".join(f"{stage} REAL" for stage in STAGES)},
+                    duration REAL,
+                    PRIMARY KEY (run, path, track)
+                )""")
+            # Manifests written before durations were recorded
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if 'duration' not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN duration REAL")
+
+    def start_run(self, params: dict) -> tuple[str, bool]:
+        """
+        Starts the run of params, or resumes it if it did not finish.
+        Returns the run id and whether the run is resumed.
+        """
+        run = run_id(params)
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT finished FROM runs WHERE run = ?", (run,)).fetchone()
+            if row is not None and row[0] is None:
+                return run, True
+            self._conn.execute("DELETE FROM jobs WHERE run = ?", (run,))
+            self._conn.execute("INSERT OR REPLACE INTO runs (run, params, started) VALUES (?, ?, ?)", (run, json.dumps(params, sort_keys=True), time.time()))
+            return run, False
+
+    def resumable_files(self, params: dict) -> list:
+        """
+        Returns the media files discovered by the unfinished run of params, or None if there is none.
+        """
+        run = run_id(params)
+        with self._lock:
+            row = self._conn.execute("SELECT discovered FROM runs WHERE run = ? AND finished IS NULL", (run,)).fetchone()
+            if row is None or not row[0]:
+                return None
+            rows = self._conn.execute("SELECT DISTINCT path FROM jobs WHERE run = ? ORDER BY path", (run,)).fetchall()
+        return [row[0] for row in rows]
+
+    def add(self, run: str, plans: list, done: list = ()) -> dict:
+        """
+        Records planned media files of a run.
+        Files that changed since they were recorded start over as pending; the done plans
+        (whose targets are all present) are recorded as written.
+        Returns the (state, attempts) of every plan, keyed by (path, track).
+        """
+        now = time.time()
+        states = {}
+        with self._lock, self._conn:
+            for plan in plans:
+                path = os.path.abspath(plan.media_file)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                row = self._conn.execute("SELECT size, mtime, state, attempts FROM jobs WHERE run = ? AND path = ? AND track = ?",
+                                         (run, path, plan.track)).fetchone()
+                if row is not None and (row[0], row[1]) == (st.st_size, st.st_mtime):
+                    states[(path, plan.track)] = (row[2], row[3])
+                    continue
+                self._conn.execute("INSERT OR REPLACE INTO jobs (run, path, track, size, mtime, state, updated) VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                                   (run, path, plan.track, st.st_size, st.st_mtime, now))
+                states[(path, plan.track)] = ('pending', 0)
+            for plan in done:
+                self._conn.execute("UPDATE jobs SET state = 'written', updated = ? WHERE run = ? AND path = ? AND track = ?",
+                                   (now, run, os.path.abspath(plan.media_file), plan.track))
+        return states
+
+    def mark_discovered(self, run: str):
+        """
+        Marks that every media file of the run has been recorded.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET discovered = 1 WHERE run = ?", (run,))
+
+    def record(self, run: str, path: str, track: int, state: str = None, stage: str = None, elapsed: float = None, error: str = None, duration: float = None):
+        """
+        Records the progress of a job: its new state, the time spent in a stage, the duration
+        of its decoded audio and, when the state is failed, the error and one more attempt.
+        """
+        assignments, values = ["updated = ?"], [time.time()]
+        if state is not None:
+            assignments.append("state = ?")
+            values.append(state)
+        if state == 'failed':
+            assignments.append("attempts = attempts + 1")
+            assignments.append("error = ?")
+            values.append(error)
+        if stage in STAGES and elapsed is not None:
+            assignments.append(f"{stage} = COALESCE({stage}, 0) + ?")
+            values.append(elapsed)
+        if duration is not None:
+            assignments.append("duration = ?")
+            values.append(duration)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE run = ? AND path = ? AND track = ?",
+                               values + [run, os.path.abspath(path), track])
+
+    def finish_run(self, run: str, retries: int) -> tuple[dict, list]:
+        """
+        Marks the run finished when no job is left to do: every job is written or failed more
+        than retries times. A finished run is not resumed, so the next run of the same
+        parameters starts over and tries its failed files again.
+        Returns the number of jobs in each state and the (path, track, attempts, error) of
+        the jobs failed more than retries times.
+        """
+        with self._lock, self._conn:
+            counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs WHERE run = ? GROUP BY state", (run,)).fetchall())
+            failed = self._conn.execute("SELECT path, track, attempts, error FROM jobs WHERE run = ? AND state = 'failed' AND attempts > ? ORDER BY path, track",
+                                        (run, retries)).fetchall()
+            if sum(counts.values()) == counts.get('written', 0) + len(failed):
+                self._conn.execute("UPDATE runs SET finished = ? WHERE run = ?", (time.time(), run))
+        return counts, failed
+
+    def timings(self, run: str) -> dict:
+        """
+        Returns the total time spent in every stage by the jobs of the run.
+        """
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(f'SUM({stage})' for stage in STAGES)} FROM jobs WHERE run = ?", (run,)).fetchone()
+        return {stage: value or 0.0 for stage, value in zip(STAGES, row)}
+
+    def estimate_rtf(self, model_name: str) -> float:
+        """
+        Returns the processing time per second of audio of the jobs written with model_name,
+        or None if no such job was timed yet.
+        """
+        with self._lock:
+            runs = [run for run, params in self._conn.execute("SELECT run, params FROM runs")
+                    if json.loads(params).get('model_name') == model_name]
+            if not runs:
+                return None
+            placeholders = ",".join("?" * len(runs))
+            elapsed, duration = self._conn.execute(
+                f"SELECT SUM({' + '.join(f'COALESCE({stage}, 0)' for stage in STAGES)}), SUM(duration) "
+                f"FROM jobs WHERE state = 'written' AND duration > 0 AND run IN ({placeholders})", runs).fetchone()
+        return elapsed / duration if duration else None
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+def get_job_manifest(db_path: str) -> JobManifest:
+    """
+    Returns the process-wide job manifest for db_path, opening it on first use.
+    """
+    with _manifests_lock:
+        manifest = _manifests.get(db_path)
+        if manifest is None:
+            manifest = JobManifest(db_path)
+            _manifests[db_path] = manifest
+        return manifest
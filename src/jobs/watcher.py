@@ -0,0 +1,185 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from utils import log, is_media_file
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT = struct.Struct("iIII")
+
+class MediaWatcher:
+    """
+    Detects new or changed media files under a folder, with inotify where available
+    and by polling the tree otherwise.
+    A file is only reported once its size and modification time have not changed for
+    debounce seconds, so files still being copied are not picked up half written.
+    """
+
+    def __init__(self, path: str, sourcetype: str = None, interval: float = 5.0, debounce: float = 10.0):
+        self.path = os.path.abspath(path)
+        self.sourcetype = sourcetype
+        self.interval = interval
+        self.debounce = debounce
+        self._changed = {}
+        self._snapshot = {}
+        self._watches = {}
+        self._fd = self._init_inotify()
+        if self._fd is None:
+            log(f"Watching {self.path} by polling every {self.interval:g}s")
+            self._snapshot = self._scan()
+            self._scanned = time.monotonic()
+        else:
+            log(f"Watching {self.path} with inotify")
+
+    def _init_inotify(self) -> int:
+        """
+        Opens an inotify instance watching every folder of the tree.
+        Returns None if inotify is not available.
+        """
+        name = ctypes.util.find_library("c")
+        if not name:
+            return None
+        try:
+            self._libc = ctypes.CDLL(name, use_errno=True)
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        self._fd = fd
+        for root, _, _ in os.walk(self.path):
+            if not self._add_watch(root):
+                os.close(fd)
+                self._watches.clear()
+                return None
+        return fd
+
+    def _add_watch(self, folder: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            log(f"WARNING: Cannot watch {folder}: {os.strerror(ctypes.get_errno())}")
+            return False
+        self._watches[wd] = folder
+        return True
+
+    def _scan(self) -> dict:
+        """
+        Returns (size, mtime) of every media file of the tree.
+        """
+        snapshot = {}
+        for root, _, files in os.walk(self.path):
+            for file in files:
+                if is_media_file(file, self.sourcetype):
+                    file_path = os.path.join(root, file)
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        continue
+                    snapshot[file_path] = (st.st_size, st.st_mtime)
+        return snapshot
+
+    def _touch(self, file_path: str):
+        """
+        Records a change to a media file, restarting its debounce.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            self._changed.pop(file_path, None)
+            return
+        self._changed[file_path] = (time.monotonic(), st.st_size, st.st_mtime)
+
+    def _read_events(self, timeout: float):
+        """
+        Waits up to timeout seconds for inotify events and records the changed media files.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                log("WARNING: inotify queue overflow, rescanning")
+                for file_path in self._scan():
+                    self._touch(file_path)
+                continue
+            folder = self._watches.get(wd)
+            if folder is None or not name:
+                continue
+            entry_path = os.path.join(folder, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Watch the new folder and pick up what landed in it before the watch
+                    for root, _, files in os.walk(entry_path):
+                        self._add_watch(root)
+                        for file in files:
+                            if is_media_file(file, self.sourcetype):
+                                self._touch(os.path.join(root, file))
+            elif is_media_file(entry_path, self.sourcetype):
+                self._touch(entry_path)
+
+    def _poll(self, timeout: float):
+        """
+        Compares the tree with the last scan once the polling interval has passed since it,
+        waiting up to timeout seconds for that. Shorter waits (such as wait(0) between queued
+        files) return without scanning, so the tree is scanned at most once per interval.
+        """
+        remaining = self.interval - (time.monotonic() - self._scanned)
+        if remaining > timeout:
+            time.sleep(timeout)
+            return
+        time.sleep(max(0.0, remaining))
+        self._scanned = time.monotonic()
+        snapshot = self._scan()
+        for file_path, version in snapshot.items():
+            if self._snapshot.get(file_path) != version:
+                self._touch(file_path)
+        self._snapshot = snapshot
+
+    def wait(self, timeout: float = None) -> list:
+        """
+        Waits up to timeout seconds (default: the polling interval) for changes.
+        Returns the media files that have settled since the last call.
+        """
+        timeout = self.interval if timeout is None else timeout
+        if self._fd is not None:
+            self._read_events(timeout)
+        else:
+            self._poll(timeout)
+
+        settled = []
+        now = time.monotonic()
+        for file_path, (changed, size, mtime) in list(self._changed.items()):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                del self._changed[file_path]
+                continue
+            if (st.st_size, st.st_mtime) != (size, mtime):
+                self._changed[file_path] = (now, st.st_size, st.st_mtime)
+            elif now - changed >= self.debounce:
+                del self._changed[file_path]
+                settled.append(file_path)
+        return sorted(settled)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
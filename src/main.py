@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
-from utils import log, suppress_warnings, list_media_files, parse_args_and_build_config
-from worker import process_media
+from utils import log, suppress_warnings, iter_media_files, parse_args_and_build_config
+from worker import process_media, watch_media, resume_media_files
 
 def main():
 
@@ -16,17 +16,22 @@ def main():
         log("Failed to parse command line arguments")
         return
 
+    # Keep the models warm and process media files as they land
+    if config.watch:
+        watch_media(config)
+        return
+
     # Search media files
     log(f"Searching for media in {config.media_path}")
     if config.sourcetype is not None:
         log(f"Only searching for {config.sourcetype} files")
-    media_files = list_media_files(config.media_path, config.sourcetype)
-    if not media_files:
-        log(f"No media files found in {config.media_path}")
-        return
-    log(f"Found {len(media_files)} media files")
+    media_files = resume_media_files(config) if config.resume else None
+    if media_files is not None:
+        log(f"Resuming with the {len(media_files)} media files found by the interrupted run")
+    else:
+        media_files = iter_media_files(config.media_path, config.sourcetype, sort=config.sorted)
 
-    # Start processing media files
+    # Start processing media files as they are found
     process_media(config, media_files)
 
     log("Done")
@@ -1 +1,5 @@
-from .transcription import Transcription
\ No newline at end of file
+from .transcription import Transcription
+from .plan import MediaPlan, TargetPlan
+from .job import MediaJob
+from .media import MediaInfo
+from .transcript import Transcript
\ No newline at end of file
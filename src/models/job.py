@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from .transcription import Transcription
+from .plan import MediaPlan
+
+@dataclass
+class MediaJob:
+    plan: MediaPlan = None
+    config: Transcription = None
+    run: str = None
+    last_track: bool = True
+    audio: object = None
+    cache_key: str = None
+    transcription: dict = None
+    translation: dict = None
+    detected_language: str = None
+    transformed: dict = None
@@ -0,0 +1,22 @@
+from dataclasses import dataclass, field
+
+@dataclass
+class MediaInfo:
+    path: str = None
+    size: int = 0
+    mtime: float = 0.0
+    duration: float = None
+    format_name: str = None
+    streams: list = field(default_factory=list)
+
+    @property
+    def audio_streams(self) -> list:
+        return [stream for stream in self.streams if stream.get('codec_type') == 'audio']
+
+    @property
+    def subtitle_streams(self) -> list:
+        return [stream for stream in self.streams if stream.get('codec_type') == 'subtitle']
+
+    @property
+    def audio_tracks(self) -> int:
+        return len(self.audio_streams)
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+
+@dataclass
+class TargetPlan:
+    job: str = None
+    targettype: str = None
+    path: str = None
+    exists: bool = False
+
+@dataclass
+class MediaPlan:
+    media_file: str = None
+    track: int = 1
+    targets: list = None
+    size: int = 0
+
+    @property
+    def determined(self) -> bool:
+        """Target paths are known before inference (they do not depend on the detected language)."""
+        return self.targets is not None
+
+    def pending(self, targetexists: str) -> bool:
+        """The file still needs processing: some target is missing, undetermined or will be overwritten/renamed."""
+        if not self.determined or targetexists != 'skip':
+            return True
+        return not all(target.exists for target in self.targets)
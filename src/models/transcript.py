@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+import numpy as np
+
+def _times(values: list) -> np.ndarray:
+    return np.array(values, dtype=np.float64) if values else np.empty(0, dtype=np.float64)
+
+def _offsets(lengths: list, base: int = 0) -> np.ndarray:
+    offsets = np.full(len(lengths) + 1, base, dtype=np.int64)
+    if lengths:
+        offsets[1:] += np.cumsum(lengths)
+    return offsets
+
+@dataclass
+class Transcript:
+    """
+    A transcription or translation stored flat: segment and word times in NumPy arrays
+    (NaN where Whisper gave none) and every stripped segment and word text in one string,
+    sliced by offsets. Segment i owns the words word_index[i] to word_index[i + 1].
+    """
+    text: str = ""
+    segment_start: np.ndarray = field(default_factory=lambda: _times([]))
+    segment_end: np.ndarray = field(default_factory=lambda: _times([]))
+    segment_offsets: np.ndarray = field(default_factory=lambda: _offsets([]))
+    word_index: np.ndarray = field(default_factory=lambda: _offsets([]))
+    word_start: np.ndarray = field(default_factory=lambda: _times([]))
+    word_end: np.ndarray = field(default_factory=lambda: _times([]))
+    word_offsets: np.ndarray = field(default_factory=lambda: _offsets([]))
+
+    @classmethod
+    def from_segments(cls, segments: list, text_tag: str = 'text') -> 'Transcript':
+        """
+        Builds a transcript from Whisper segments (or MarianMT translations), in one pass.
+        """
+        nan = float('nan')
+        segment_texts, segment_start, segment_end, word_counts = [], [], [], []
+        word_texts, word_start, word_end = [], [], []
+        for segment in segments:
+            segment_texts.append(segment.get(text_tag, '').strip())
+            start, end = segment.get('start'), segment.get('end')
+            segment_start.append(nan if start is None else start)
+            segment_end.append(nan if end is None else end)
+            words = segment.get('words') or ()
+            word_counts.append(len(words))
+            for word in words:
+                word_texts.append(word.get('word', '').strip())
+                start, end = word.get('start'), word.get('end')
+                word_start.append(nan if start is None else start)
+                word_end.append(nan if end is None else end)
+
+        # Segment texts first, then word texts, in a single buffer
+        segment_offsets = _offsets([len(text) for text in segment_texts])
+        return cls(
+            text="".join(segment_texts) + "".join(word_texts),
+            segment_start=_times(segment_start),
+            segment_end=_times(segment_end),
+            segment_offsets=segment_offsets,
+            word_index=_offsets(word_counts),
+            word_start=_times(word_start),
+            word_end=_times(word_end),
+            word_offsets=_offsets([len(text) for text in word_texts], int(segment_offsets[-1]))
+        )
+
+    @classmethod
+    def of(cls, value, text_tag: str = 'text') -> 'Transcript':
+        """
+        Returns value if it is already a transcript, else builds one from its segments.
+        """
+        return value if isinstance(value, cls) else cls.from_segments(value, text_tag)
+
+    def __len__(self) -> int:
+        return len(self.segment_start)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.word_start)
+
+    def segment_texts(self, first: int = 0, last: int = None) -> list:
+        """
+        Returns the stripped text of the segments first to last (every segment by default).
+        """
+        bounds = self.segment_offsets[first:(len(self) if last is None else last) + 1].tolist()
+        return [self.text[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+    def word_texts(self, first: int = 0, last: int = None) -> list:
+        """
+        Returns the stripped text of the words first to last (every word by default), segment after segment.
+        """
+        bounds = self.word_offsets[first:(self.word_count if last is None else last) + 1].tolist()
+        return [self.text[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+    def batches(self, size: int = 256):
+        """
+        Yields (first, last) ranges of up to size segments, so formatters can work on a
+        bounded slice of the transcript at a time.
+        """
+        for first in range(0, len(self), size):
+            yield first, min(first + size, len(self))
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class Transcription:
@@ -8,7 +8,8 @@ class Transcription:
     sourcetype: str = None
     sourcelanguage: str = None
     targetlanguage: str = None
-    targettype: str = "lrc"
+    targettype: list = field(default_factory=lambda: ["lrc"])
+    json_words: bool = False
     targetexists: str = "skip"
     targetsuffix: bool = False
     media_path: str = "./media"
@@ -16,3 +17,43 @@ class Transcription:
     exportall: bool = False
     model: object = None
     channel: int = 1
+    track: int | str = 1
+    temperature: float = 0.0
+    beam_size: int = 5
+    best_of: int = 5
+    prompt: str = None
+    dry_run: bool = False
+    cache: bool = True
+    cache_dir: str = "~/.cache/takigrapher/transcriptions"
+    cache_size: int = 2048
+    workers: int = 1
+    threads: int = None
+    queue_size: int = 2
+    translate_batch_size: int = 16
+    translate_max_tokens: int = 4096
+    translation_memory: bool = True
+    translation_memory_path: str = "~/.cache/takigrapher/translations.sqlite"
+    translation_memory_size: int = 200000
+    marianmt_memory: int = 2048
+    whisper_memory: int = 4096
+    media_index: bool = True
+    media_index_path: str = "~/.cache/takigrapher/media.sqlite"
+    probe_workers: int = 4
+    chunk_length: int = 0
+    chunk_workers: int = 2
+    vad: bool = False
+    vad_threshold: float = -40.0
+    vad_min_silence: float = 1.0
+    watch: bool = False
+    watch_interval: float = 5.0
+    watch_debounce: float = 10.0
+    queue_path: str = "~/.cache/takigrapher/queue.sqlite"
+    manifest: bool = True
+    manifest_path: str = "~/.cache/takigrapher/manifest.sqlite"
+    retries: int = 2
+    resume: bool = False
+    sorted: bool = False
+    schedule: str = "found"
+    time_budget: float = None
+    metrics_path: str = None
+    prometheus_path: str = None
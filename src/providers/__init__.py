@@ -1,2 +1,2 @@
-from .marianmt import translate_text_offline, load_marianmt_model
-from .openaiwhisper import load_whisper_model
\ No newline at end of file
+from .marianmt import translate_text_offline, load_marianmt_model, get_marianmt_model, marianmt_registry
+from .openaiwhisper import load_whisper_model, get_whisper_model, resolve_device, transcribe_audio, whisper_registry, SAMPLE_RATE
\ No newline at end of file
@@ -3,50 +3,123 @@ from utils import log, print_progress_bar
 from models import Transcription
 from transformers import MarianMTModel, MarianTokenizer
 from datetime import datetime
+from cache import get_translation_memory, normalize_text
+from .registry import ModelRegistry
+
+def model_size(pair: tuple) -> int:
+    """
+    Returns the memory used by the parameters and buffers of a (tokenizer, model) pair, in bytes.
+    """
+    _, model = pair
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+marianmt_registry = ModelRegistry("MarianMT", size_of=model_size)
+
+def batch_by_length(lengths: list, batch_size: int, max_tokens: int) -> list:
+    """
+    Groups item indices into batches sorted by token length, so that padding is minimal.
+    A batch holds at most batch_size items and at most max_tokens padded tokens.
+    Returns a list of batches, each a list of indices into lengths.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current = []
+    for index in order:
+        longest = max(lengths[index], lengths[current[-1]] if current else 0)
+        if current and (len(current) >= batch_size or longest * (len(current) + 1) > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
 
 def translate_text_offline(config: Transcription, model_name: str, text_original: dict) -> dict:
     """
     Translates text using MarianMT. Adds a 'translations' array to the original object,
     replicating the structure of 'segments' but with translated text and adjusted word timings.
+    Distinct segment texts are looked up in the translation memory first; the rest are
+    translated in padded batches sorted by token length.
     """
     if text_original is None or 'segments' not in text_original:
         log("No text provided for translation.")
         return None
 
-    tokenizer, model = load_marianmt_model(model_name)
-    if tokenizer is None or model is None:
-        return None
+    segments = text_original['segments']
+    for segment in segments:
+        if segment['text'] is None:
+            log("No text found in the segment for translation.")
+            return None
 
-    cnt = 0
-    total_segments = len(text_original['segments'])
-    translations = []
+    total_segments = len(segments)
     timestamp = "[" + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "]"
 
-    for segment in text_original['segments']:
-        if segment['text'] is None:
-            log("No text found in the segment for translation.")
+    # Only non-empty segments are translated, each distinct text once
+    pending = [i for i, segment in enumerate(segments) if segment['text'].strip()]
+    sources = [normalize_text(segments[i]['text']) for i in pending]
+    translated_texts = [""] * total_segments
+
+    # Reuse translations from the persistent memo
+    memory = None
+    known = {}
+    if config.translation_memory:
+        memory = get_translation_memory(config.translation_memory_path, config.translation_memory_size)
+        known = memory.lookup(model_name, sources)
+    missing = [source for source in dict.fromkeys(sources) if source not in known]
+    if known:
+        log(f"Translation memory: {len(known)} of {len(known) + len(missing)} distinct segments already translated")
+
+    if missing:
+        tokenizer, model = get_marianmt_model(config, model_name)
+        if tokenizer is None or model is None:
             return None
 
-        segment_text = segment['text']
-        translated_text = ""
-        translated_words = []
+        cnt = 0
+        lengths = [len(ids) for ids in tokenizer(missing,
+                                                 truncation=True,
+                                                 max_length=512,
+                                                 add_special_tokens=True)['input_ids']]
 
-        if segment_text.strip():
-            # Translate the full sentence
-            inputs = tokenizer(segment_text,
+        translated = {}
+        for batch in batch_by_length(lengths, config.translate_batch_size, config.translate_max_tokens):
+            batch_texts = [missing[i] for i in batch]
+            # Translate the full sentences of the batch at once
+            inputs = tokenizer(batch_texts,
                                return_tensors="pt",
                                truncation=True,
                                max_length=512,
                                add_special_tokens=True,
                                padding=True)
             translations_output = model.generate(**inputs)
-            translated_text = tokenizer.decode(
-                translations_output[0],
+            decoded = tokenizer.batch_decode(
+                translations_output,
                 skip_special_tokens=True,
                 clean_up_tokenization_spaces=False,
                 spaces_between_special_tokens=False
             )
 
+            for source_text, translated_text in zip(batch_texts, decoded):
+                translated[source_text] = translated_text
+                cnt += 1
+                if config.verbose:
+                    log(f"{cnt}/{len(missing)}: {source_text} ⏩⏩⏩ {translated_text.strip()}")
+            if not config.verbose:
+                print_progress_bar(cnt, len(missing), length=20, prefix=timestamp)
+
+        if memory is not None:
+            memory.store(model_name, translated)
+        known.update(translated)
+
+    # Map results back to the original segment order
+    for i, source_text in zip(pending, sources):
+        translated_texts[i] = known[source_text]
+
+    translations = []
+    for segment, translated_text in zip(segments, translated_texts):
+        translated_words = []
+
+        if translated_text:
             # Split translated text into words
             translated_word_list = translated_text.split()
             num_translated_words = len(translated_word_list)
@@ -76,12 +149,6 @@ def translate_text_offline(config: Transcription, model_name: str, text_original
             'words': translated_words
         })
 
-        cnt += 1
-        if config.verbose:
-            log(f"{cnt}/{total_segments}: {segment_text.strip()} ⏩⏩⏩ {translated_text.strip()}")
-        else:
-            print_progress_bar(cnt, total_segments, length=20, prefix=timestamp)
-
     # Add translations array to the original object
     text_original['translations'] = translations
     return text_original
@@ -111,3 +178,19 @@ def load_marianmt_model(model_name):
     if "ConnectionError" in str(e) or "network" in str(e).lower():
       log("No internet connection. Make sure the model has been downloaded previously.")
     return None, None
+
+def get_marianmt_model(config: Transcription, model_name: str):
+  """
+  Returns a resident (tokenizer, model) pair for model_name, loading it only once per process.
+  Least recently used pairs are dropped when the loaded pairs exceed the configured memory budget.
+  Returns None, None if loading fails.
+  """
+  marianmt_registry.max_bytes = config.marianmt_memory * 1024 * 1024
+  pair = marianmt_registry.get((model_name,), lambda: _loaded_pair(model_name))
+  return pair if pair is not None else (None, None)
+
+def _loaded_pair(model_name: str):
+  tokenizer, model = load_marianmt_model(model_name)
+  if tokenizer is None or model is None:
+    return None
+  return tokenizer, model
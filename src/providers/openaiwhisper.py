@@ -1,6 +1,32 @@
 import whisper  # openai-whisper
 from models import Transcription
 from utils import log
+from .registry import ModelRegistry
+
+def model_size(model) -> int:
+    """
+    Returns the memory used by the parameters and buffers of a Whisper model, in bytes.
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+whisper_registry = ModelRegistry("Whisper", size_of=model_size)
+
+# Whisper expects 16 kHz mono audio
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+def resolve_device(config: Transcription) -> str:
+    """
+    Resolves the device to run Whisper on (GPU if available, else CPU).
+    """
+    import torch
+    if config.device is not None:
+        device = config.device
+        if device == "gpu" and not torch.cuda.is_available():
+            device = "cpu"
+    else:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    return device
 
 def load_whisper_model(config: Transcription):
     """
@@ -8,13 +34,7 @@ def load_whisper_model(config: Transcription):
     Returns the loaded model or None if loading fails.
     """
     try:
-        import torch
-        if config.device is not None:
-            device = config.device
-            if device == "gpu" and not torch.cuda.is_available():
-                device = "cpu"
-        else:
-            device = "cuda" if torch.cuda.is_available() else "cpu"
+        device = resolve_device(config)
         if config.verbose:
           log(f"Using device: {'gpu' if device == 'cuda' else device}")
         model = whisper.load_model(config.model_name,
@@ -24,3 +44,39 @@ def load_whisper_model(config: Transcription):
     except Exception as e:
         log(f"Error: Whisper model load failed: {e}")
         return None
+
+def get_whisper_model(config: Transcription):
+    """
+    Returns a warm Whisper model for (model_name, device, inmemory), loading it only once per process.
+    Least recently used models are dropped when the loaded models exceed the configured memory budget.
+    Returns None if loading fails.
+    """
+    try:
+        device = resolve_device(config)
+    except Exception as e:
+        log(f"Error: Whisper device resolution failed: {e}")
+        return None
+    key = (config.model_name, device, config.inmemory)
+    whisper_registry.max_bytes = config.whisper_memory * 1024 * 1024
+    return whisper_registry.get(key, lambda: load_whisper_model(config))
+
+def transcribe_audio(config: Transcription, audio, language: str = None) -> dict:
+    """
+    Transcribes decoded audio on the warm Whisper model, in language (or config.sourcelanguage).
+    Returns the Whisper result or None if the model cannot be loaded; decoding errors are raised.
+    """
+    model = get_whisper_model(config)
+    if model is None:
+        log(f"Failed to load model: {config.model_name}")
+        return None
+    return model.transcribe(
+        audio=audio,
+        task="transcribe",
+        language=language or config.sourcelanguage,
+        verbose=config.verbose,
+        word_timestamps=True,
+        beam_size=config.beam_size,
+        best_of=config.best_of,
+        temperature=config.temperature,
+        prompt=config.prompt
+    )
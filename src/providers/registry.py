@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from utils import log, span
+
+class ModelRegistry:
+    """
+    Keeps loaded models in memory so they are loaded once per process and reused.
+    Models are stored by key; load time and reuse counters are tracked per key.
+    With a memory budget (max_bytes and size_of), the least recently used models
+    are dropped when the loaded models no longer fit in the budget.
+    """
+
+    def __init__(self, name: str, max_bytes: int = None, size_of=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, loader):
+        """
+        Returns the model stored under key, calling loader() to load it on first use.
+        Returns None (and caches nothing) if loader fails.
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._stats[key]['reuses'] += 1
+                return self._models[key]
+
+            start = time.perf_counter()
+            with span(f"{self.name.lower()}_load"):
+                model = loader()
+            elapsed = time.perf_counter() - start
+            if model is None:
+                return None
+
+            self._models[key] = model
+            self._sizes[key] = self.size_of(model) if self.size_of is not None else 0
+            stats = self._stats.setdefault(key, {'loads': 0, 'reuses': 0, 'evictions': 0, 'load_time': 0.0})
+            stats['loads'] += 1
+            stats['load_time'] += elapsed
+            self._evict(keep=key)
+            return model
+
+    def _evict(self, keep: tuple):
+        """
+        Drops least recently used models (never keep) until the loaded models fit in max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        while sum(self._sizes.values()) > self.max_bytes and len(self._models) > 1:
+            key = next(iter(self._models))
+            if key == keep:
+                break
+            del self._models[key]
+            del self._sizes[key]
+            self._stats[key]['evictions'] += 1
+            log(f"{self.name} model {key} evicted to stay within {self.max_bytes / (1024 * 1024):.0f} MB")
+
+    def stats(self) -> dict:
+        """
+        Returns a copy of the per-key counters: loads, reuses, evictions and load_time (seconds).
+        """
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def log_stats(self):
+        """
+        Logs the counters of every model loaded in this registry.
+        """
+        for key, value in self.stats().items():
+            evicted = f", evicted {value['evictions']}x" if value['evictions'] else ""
+            log(f"{self.name} model {key}: loaded {value['loads']}x in {value['load_time']:.2f}s, reused {value['reuses']}x{evicted}")
+
+    def clear(self):
+        """
+        Drops every loaded model and its counters.
+        """
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+            self._stats.clear()
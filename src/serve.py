@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+from utils import log, suppress_warnings
+from server import TranscriptionService, HttpError, serve
+
+def main():
+
+    # Suppress warnings
+    log("Suppressing warnings")
+    suppress_warnings()
+    log("Warnings suppressed")
+
+    # Server options; every other option is a default for the requests
+    parser = argparse.ArgumentParser(
+        description="Serve transcriptions over HTTP on warm models",
+        usage="python3 serve.py [--host HOST] [--port PORT] [--concurrency N] [--max-queue N] [--max-upload MB] [transcription options]",
+        prog="serve.py"
+    )
+    parser.add_argument("--host", dest="host", action="store", type=str,
+                        help="address to listen on. (Default: 127.0.0.1)", default="127.0.0.1")
+    parser.add_argument("--port", dest="port", action="store", type=int,
+                        help="port to listen on. (Default: 8765)", default=8765)
+    parser.add_argument("--concurrency", dest="concurrency", metavar="N", action="store",
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("concurrency must be a positive integer"),
+                        help="requests processed at once, each on its own worker process. (Default: 1)", default=1)
+    parser.add_argument("--max-queue", dest="max_queue", metavar="N", action="store",
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("max queue must be a positive integer"),
+                        help="requests waiting before new ones are rejected. (Default: 16)", default=16)
+    parser.add_argument("--max-upload", dest="max_upload", metavar="MB", action="store",
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("max upload must be a positive integer"),
+                        help="largest uploaded media file, in megabytes. (Default: 2048)", default=2048)
+    args, base_args = parser.parse_known_args()
+
+    log("Parsing default transcription options")
+    try:
+        service = TranscriptionService(base_args, args.concurrency, args.max_queue, args.max_upload)
+    except HttpError as e:
+        log(f"Invalid transcription options: {e.message}")
+        return
+    asyncio.run(serve(service, args.host, args.port))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nServer stopped by user.")
\ No newline at end of file
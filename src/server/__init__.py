@@ -0,0 +1,2 @@
+from .service import TranscriptionService, serve
+from .http import HttpError
\ No newline at end of file
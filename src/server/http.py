@@ -0,0 +1,107 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, parse_qs
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+class HttpError(Exception):
+    """
+    An error answered to the client with an HTTP status and a message.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+@dataclass
+class Request:
+    method: str = None
+    path: str = None
+    query: dict = field(default_factory=dict)
+    headers: dict = field(default_factory=dict)
+    reader: asyncio.StreamReader = None
+
+    @property
+    def content_length(self) -> int:
+        try:
+            return int(self.headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+
+    def param(self, name: str, default: str = None) -> str:
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    async def json(self, max_bytes: int) -> dict:
+        """
+        Reads the body as a JSON object.
+        """
+        if self.content_length > max_bytes:
+            raise HttpError(413, f"Request body larger than {max_bytes} bytes")
+        body = await self.reader.readexactly(self.content_length)
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HttpError(400, f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Expected a JSON object")
+        return data
+
+    async def save_body(self, f, max_bytes: int, chunk_size: int = 1024 * 1024):
+        """
+        Streams the body into the file object f, without holding it in memory.
+        """
+        remaining = self.content_length
+        if remaining > max_bytes:
+            raise HttpError(413, f"Upload larger than {max_bytes} bytes")
+        while remaining > 0:
+            chunk = await self.reader.readexactly(min(chunk_size, remaining))
+            f.write(chunk)
+            remaining -= len(chunk)
+
+async def read_request(reader: asyncio.StreamReader) -> Request:
+    """
+    Reads the request line and headers of an HTTP/1.1 request; the body is left in the reader.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, "Request headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Invalid request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    url = urlsplit(target)
+    return Request(method=method.upper(), path=url.path, query=parse_qs(url.query), headers=headers, reader=reader)
+
+async def write_response(writer: asyncio.StreamWriter, status: int, body, content_type: str = "application/json"):
+    """
+    Writes a complete response and closes the connection. Dicts and lists are sent as JSON.
+    """
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    writer.close()
@@ -0,0 +1,239 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import shlex
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+from utils import log, suppress_warnings, build_parser, build_config, is_media_file
+from models import Transcription
+from providers import get_whisper_model
+from worker import transform_media_file
+from .http import HttpError, Request, read_request, write_response
+
+# Configuration owned by the server: files it reads and writes, and the memory of its workers.
+# Requests that try to change these are rejected
+SERVER_OPTIONS = ('cache', 'cache_dir', 'cache_size', 'manifest', 'manifest_path', 'media_index', 'media_index_path',
+                  'translation_memory', 'translation_memory_path', 'translation_memory_size', 'queue_path',
+                  'metrics_path', 'prometheus_path', 'whisper_memory', 'marianmt_memory')
+
+def _init_service_worker(threads: int, config: Transcription):
+    """
+    Initializes a service worker process and warms up the default Whisper model.
+    """
+    suppress_warnings()
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    get_whisper_model(config)
+
+def _transform_media_file_captured(config: Transcription, media_file: str) -> tuple:
+    """
+    Runs transform_media_file in a service worker process, capturing its log.
+    """
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        try:
+            results = transform_media_file(config, media_file)
+        except Exception as e:
+            log(f"ERROR: Processing failed {media_file}: {e}")
+            results = None
+    return results, buffer.getvalue()
+
+def percentiles(values) -> dict:
+    """
+    Returns the median, 95th percentile and maximum of a list of latencies, in seconds.
+    """
+    values = sorted(values)
+    if not values:
+        return {'p50': None, 'p95': None, 'max': None}
+    return {
+        'p50': round(values[len(values) // 2], 3),
+        'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        'max': round(values[-1], 3)
+    }
+
+class TranscriptionService:
+    """
+    Queues transcription requests and runs them on a pool of worker processes, each keeping
+    its Whisper and MarianMT models warm between requests.
+    At most concurrency requests run at once and at most max_queue wait; more are rejected.
+    Request options are parsed like the command line, on top of the server defaults.
+    """
+
+    def __init__(self, base_args: list, concurrency: int = 1, max_queue: int = 16, max_upload: int = 2048, threads: int = None):
+        self.base_args = base_args
+        self.config = self.parse_options([])
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_upload = max_upload * 1024 * 1024
+        self.threads = threads if threads else max(1, (os.cpu_count() or 1) // concurrency)
+        self.running = 0
+        self.counters = {'completed': 0, 'failed': 0, 'rejected': 0}
+        self.latencies = {'queue_wait': deque(maxlen=1000), 'processing': deque(maxlen=1000), 'total': deque(maxlen=1000)}
+        self._queue = None
+        self._executor = None
+        self._consumers = []
+        self._next_id = 0
+
+    def parse_options(self, args: list) -> Transcription:
+        """
+        Builds the configuration of a request from its options, on top of the server defaults.
+        Options of SERVER_OPTIONS (paths, caches and memory budgets) are the server's; requests cannot change them.
+        """
+        stderr = io.StringIO()
+        try:
+            with redirect_stderr(stderr):
+                config = build_config(build_parser().parse_args(["-m", "."] + self.base_args + list(args)))
+        except SystemExit:
+            raise HttpError(400, stderr.getvalue().strip().splitlines()[-1] if stderr.getvalue().strip() else "Invalid options")
+        if args:
+            changed = [name for name in SERVER_OPTIONS if getattr(config, name) != getattr(self.config, name)]
+            if changed:
+                raise HttpError(400, f"Server options cannot be set by a request: {', '.join(changed)}")
+        return config
+
+    async def start(self):
+        log(f"Starting {self.concurrency} service workers with {self.threads} torch threads each")
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor = ProcessPoolExecutor(max_workers=self.concurrency,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_service_worker,
+                                             initargs=(self.threads, self.config))
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+
+    async def close(self):
+        for consumer in self._consumers:
+            consumer.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            config, media_file, queued, future = await self._queue.get()
+            started = time.perf_counter()
+            self.running += 1
+            try:
+                result = await loop.run_in_executor(self._executor, _transform_media_file_captured, config, media_file)
+                if not future.cancelled():
+                    future.set_result((result, started - queued, time.perf_counter() - started))
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    async def transcribe(self, config: Transcription, media_file: str) -> dict:
+        """
+        Queues a media file and waits for its outputs.
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        queued = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((config, media_file, queued, future))
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise HttpError(503, f"Queue full ({self.max_queue} requests waiting)")
+        log(f"Request {request_id}: queued {media_file} ({self._queue.qsize()} waiting)")
+
+        (results, output), queue_wait, processing = await future
+        self.latencies['queue_wait'].append(queue_wait)
+        self.latencies['processing'].append(processing)
+        self.latencies['total'].append(queue_wait + processing)
+        if results is None:
+            self.counters['failed'] += 1
+            log(f"Request {request_id}: failed")
+            raise HttpError(500, output.strip().splitlines()[-1] if output.strip() else "Processing failed")
+        self.counters['completed'] += 1
+        log(f"Request {request_id}: done in {queue_wait + processing:.2f}s ({queue_wait:.2f}s queued)")
+        return {
+            'id': request_id,
+            'media': media_file,
+            'tracks': results,
+            'queue_wait': round(queue_wait, 3),
+            'processing': round(processing, 3)
+        }
+
+    def metrics(self) -> dict:
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_limit': self.max_queue,
+            'running': self.running,
+            'concurrency': self.concurrency,
+            **self.counters,
+            'latency': {name: percentiles(values) for name, values in self.latencies.items()}
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers one HTTP request:
+        POST /transcribe with a JSON body {"media": path, "args": [options]}, or with the media file
+        as the raw body and ?filename=name.ext&args=options; GET /metrics; GET /health.
+        """
+        try:
+            request = await read_request(reader)
+            match (request.method, request.path):
+                case ('POST', '/transcribe'):
+                    status, body = 200, await self._handle_transcribe(request)
+                case ('GET', '/metrics'):
+                    status, body = 200, self.metrics()
+                case ('GET', '/health'):
+                    status, body = 200, {'status': 'ok'}
+                case (_, '/transcribe' | '/metrics' | '/health'):
+                    raise HttpError(405, f"Method {request.method} not allowed on {request.path}")
+                case _:
+                    raise HttpError(404, f"Unknown path {request.path}")
+        except HttpError as e:
+            status, body = e.status, {'error': e.message}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            log(f"ERROR: Request failed: {e}")
+            status, body = 500, {'error': str(e)}
+        try:
+            await write_response(writer, status, body)
+        except ConnectionError:
+            pass
+
+    async def _handle_transcribe(self, request: Request) -> dict:
+        if request.headers.get('content-type', '').startswith('application/json'):
+            data = await request.json(1024 * 1024)
+            args = data.get('args', [])
+            if isinstance(args, str):
+                args = shlex.split(args)
+            config = self.parse_options(args)
+            media_file = data.get('media')
+            if not media_file or not os.path.isfile(media_file):
+                raise HttpError(400, f"Media file not found: {media_file}")
+            return await self.transcribe(config, os.path.abspath(media_file))
+
+        # Uploaded media file
+        filename = os.path.basename(request.param('filename', ''))
+        if not is_media_file(filename):
+            raise HttpError(400, f"Not a supported media file name: {filename or '(missing filename)'}")
+        config = self.parse_options(shlex.split(request.param('args', '')))
+        with tempfile.TemporaryDirectory(prefix="takigrapher-") as folder:
+            media_file = os.path.join(folder, filename)
+            with open(media_file, 'wb') as f:
+                await request.save_body(f, self.max_upload)
+            return await self.transcribe(config, media_file)
+
+async def serve(service: TranscriptionService, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Serves the transcription service over HTTP until interrupted.
+    """
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port, limit=64 * 1024)
+    log(f"Listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
@@ -1,4 +1,7 @@
 from .suppress_warnings import suppress_warnings
-from .cli_args import parse_args_and_build_config
-from .log import log, print_progress_bar
-from .files import list_media_files, count_audio_tracks, extract_audio_track
\ No newline at end of file
+from .cli_args import parse_args_and_build_config, build_parser, build_config
+from .log import log, print_progress_bar, format_duration
+from .files import iter_media_files, list_media_files, is_media_file, write_text_atomic, probe_media, decode_audio_track, decode_audio_tracks
+from .audio import frame_energy, find_silence_splits, speech_regions
+from .pipeline import Stage, run_pipeline, log_pipeline_stats
+from .metrics import configure_metrics, metrics_enabled, span, record_span, finish_file, metrics_snapshot, merge_metrics, write_metrics
\ No newline at end of file
@@ -0,0 +1,61 @@
+import numpy as np
+
+def frame_energy(audio: np.ndarray, sample_rate: int, frame: float = 0.03) -> np.ndarray:
+    """
+    Returns the mean energy of every frame of the audio (frame length in seconds).
+    A trailing partial frame is ignored.
+    """
+    frame_size = max(1, int(sample_rate * frame))
+    frames = len(audio) // frame_size
+    return np.square(audio[:frames * frame_size].reshape(frames, frame_size), dtype=np.float32).mean(axis=1)
+
+def find_silence_splits(audio: np.ndarray, sample_rate: int, chunk_length: float, window: float = 30.0, frame: float = 0.03, smooth: float = 0.5) -> list:
+    """
+    Finds where to split audio into chunks of about chunk_length seconds.
+    Every split is placed at the quietest point (energy averaged over smooth seconds)
+    within window seconds of the nominal chunk boundary, so no word is cut in half.
+    The last chunk is never shorter than chunk_length - window seconds.
+    Returns the split positions as sample indices.
+    """
+    frame_size = max(1, int(sample_rate * frame))
+    energy = frame_energy(audio, sample_rate, frame)
+    width = max(1, int(smooth / frame))
+    energy = np.convolve(energy, np.ones(width, dtype=np.float32) / width, mode="same")
+
+    chunk_frames = max(1, int(chunk_length / frame))
+    window_frames = min(int(window / frame), chunk_frames // 2)
+    splits = []
+    position = 0
+    while len(energy) - position > chunk_frames + window_frames:
+        target = position + chunk_frames
+        low, high = target - window_frames, target + window_frames + 1
+        position = low + int(np.argmin(energy[low:high]))
+        splits.append(position * frame_size)
+    return splits
+
+def speech_regions(audio: np.ndarray, sample_rate: int, threshold: float = -40.0, min_silence: float = 1.0, padding: float = 0.25, frame: float = 0.03) -> list:
+    """
+    Finds the regions of audio that may contain speech, from the frame energy.
+    Frames louder than threshold dB below the loudest frame are speech; every region is
+    widened by padding seconds and regions separated by less than min_silence seconds are joined.
+    Returns (start, end) sample indices, in order.
+    """
+    frame_size = max(1, int(sample_rate * frame))
+    energy = frame_energy(audio, sample_rate, frame)
+    if len(energy) == 0:
+        return []
+    level = 10 * np.log10(energy + 1e-10)
+    speech = np.concatenate(([0], (level > level.max() + threshold).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(speech))
+    starts, ends = edges[0::2], edges[1::2]
+    if len(starts) == 0:
+        return []
+
+    pad = int(padding / frame)
+    starts = np.maximum(starts - pad, 0)
+    ends = np.minimum(ends + pad, len(energy))
+    joined = starts[1:] - ends[:-1] < int(min_silence / frame)
+    starts = starts[np.concatenate(([True], ~joined))]
+    ends = ends[np.concatenate((~joined, [True]))]
+    return [(int(start) * frame_size, len(audio) if end == len(energy) else int(end) * frame_size)
+            for start, end in zip(starts, ends)]
@@ -2,7 +2,10 @@ import argparse
 import whisper
 from models import Transcription
 
-def parse_args_and_build_config():
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the parser of the transcription options, shared by the command line and the HTTP service.
+    """
     parser = argparse.ArgumentParser(
         description="Transcribe media files to LRC using Whisper",
         formatter_class=argparse.RawTextHelpFormatter,
@@ -115,12 +118,19 @@ turbo: Fastest variant, high accuracy, resource-efficient.""",
                         dest="targettype",
                         metavar="TYPE",
                         action="store", 
-                        nargs="?",
+                        nargs="+",
                         required=False,
                         type=str,
-                        choices=["lrc", "txt", "srt", "vtt", "json"],
-                        help="available types: lrc, txt, srt, json, vtt. (Default: lrc)",
-                        default="lrc")
+                        choices=["lrc", "txt", "srt", "vtt", "json", "ndjson", "all"],
+                        help="available types: lrc, txt, srt, json, ndjson, vtt or all. Several types can be given at once. (Default: lrc)",
+                        default=["lrc"])
+
+    parser.add_argument("--json-words",
+                        dest="json_words",
+                        action="store_true",
+                        required=False,
+                        help="add word timings to json and ndjson targets. (Default: false)",
+                        default=False)
 
     parser.add_argument("-te", "--targetexists",
                         dest="targetexists",
@@ -151,10 +161,306 @@ turbo: Fastest variant, high accuracy, resource-efficient.""",
                         dest="track",
                         action="store",
                         required=False,
-                        type=lambda x: int(x) if int(x) > 0 else parser.error("track must be a positive integer"),
-                        help="extract audio track (1=first, 2=second, 3=third, etc). (Default: 1)",
+                        type=lambda x: x if x == "all" else int(x) if x.isdigit() and int(x) > 0 else parser.error("track must be a positive integer or 'all'"),
+                        help="extract audio track (1=first, 2=second, 3=third, etc) or 'all' to transcribe every track, writing <name>.trackN.<ext> targets. (Default: 1)",
                         default=1)
 
+    parser.add_argument("--translate-batch-size",
+                        dest="translate_batch_size",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("translate batch size must be a positive integer"),
+                        help="maximum segments translated together in one batch. (Default: 16)",
+                        default=16)
+
+    parser.add_argument("--translate-max-tokens",
+                        dest="translate_max_tokens",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("translate max tokens must be a positive integer"),
+                        help="maximum padded tokens in one translation batch. (Default: 4096)",
+                        default=4096)
+
+    parser.add_argument("--no-media-index",
+                        dest="media_index",
+                        action="store_false",
+                        required=False,
+                        help="do not keep probed media metadata between runs. (Default: enabled)",
+                        default=True)
+
+    parser.add_argument("--media-index",
+                        dest="media_index_path",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="SQLite file of the media metadata index. (Default: ~/.cache/takigrapher/media.sqlite)",
+                        default="~/.cache/takigrapher/media.sqlite")
+
+    parser.add_argument("--probe-workers",
+                        dest="probe_workers",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("probe workers must be a positive integer"),
+                        help="threads probing media metadata ahead of transcription. (Default: 4)",
+                        default=4)
+
+    parser.add_argument("--whisper-memory",
+                        dest="whisper_memory",
+                        metavar="MB",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("whisper memory must be a positive integer"),
+                        help="memory budget for Whisper models kept loaded across files and requests, in megabytes. (Default: 4096)",
+                        default=4096)
+
+    parser.add_argument("--marianmt-memory",
+                        dest="marianmt_memory",
+                        metavar="MB",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("marianmt memory must be a positive integer"),
+                        help="memory budget for MarianMT models kept loaded across files and language pairs, in megabytes. (Default: 2048)",
+                        default=2048)
+
+    parser.add_argument("--no-translation-memory",
+                        dest="translation_memory",
+                        action="store_false",
+                        required=False,
+                        help="disable the persistent translation memory. (Default: enabled)",
+                        default=True)
+
+    parser.add_argument("--translation-memory",
+                        dest="translation_memory_path",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="SQLite file of the translation memory. (Default: ~/.cache/takigrapher/translations.sqlite)",
+                        default="~/.cache/takigrapher/translations.sqlite")
+
+    parser.add_argument("--translation-memory-size",
+                        dest="translation_memory_size",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("translation memory size must be a positive integer"),
+                        help="maximum segments kept in the translation memory. (Default: 200000)",
+                        default=200000)
+
+    parser.add_argument("--watch",
+                        dest="watch",
+                        action="store_true",
+                        required=False,
+                        help="keep running and process new or changed media files under --media as they land. (Default: false)",
+                        default=False)
+
+    parser.add_argument("--watch-interval",
+                        dest="watch_interval",
+                        metavar="SECONDS",
+                        action="store",
+                        required=False,
+                        type=lambda x: float(x) if float(x) > 0 else parser.error("watch interval must be positive"),
+                        help="how often the media folder is checked when inotify is not available. (Default: 5)",
+                        default=5.0)
+
+    parser.add_argument("--watch-debounce",
+                        dest="watch_debounce",
+                        metavar="SECONDS",
+                        action="store",
+                        required=False,
+                        type=lambda x: float(x) if float(x) >= 0 else parser.error("watch debounce must not be negative"),
+                        help="how long a media file must stay unchanged before it is processed. (Default: 10)",
+                        default=10.0)
+
+    parser.add_argument("--queue",
+                        dest="queue_path",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="SQLite file of the watch mode job queue. (Default: ~/.cache/takigrapher/queue.sqlite)",
+                        default="~/.cache/takigrapher/queue.sqlite")
+
+    parser.add_argument("--no-manifest",
+                        dest="manifest",
+                        action="store_false",
+                        required=False,
+                        help="do not record runs in the job manifest, so interrupted runs cannot be resumed. (Default: enabled)",
+                        default=True)
+
+    parser.add_argument("--manifest",
+                        dest="manifest_path",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="SQLite file of the job manifest. (Default: ~/.cache/takigrapher/manifest.sqlite)",
+                        default="~/.cache/takigrapher/manifest.sqlite")
+
+    parser.add_argument("--retries",
+                        dest="retries",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) >= 0 else parser.error("retries must not be negative"),
+                        help="times a failed media file is retried when an interrupted run is resumed. (Default: 2)",
+                        default=2)
+
+    parser.add_argument("--resume",
+                        dest="resume",
+                        action="store_true",
+                        required=False,
+                        help="reuse the media files found by the interrupted run instead of searching again. (Default: false)",
+                        default=False)
+
+    parser.add_argument("--sorted",
+                        dest="sorted",
+                        action="store_true",
+                        required=False,
+                        help="process media files in a stable name order instead of the order they are found on disk. (Default: false)",
+                        default=False)
+
+    parser.add_argument("--schedule",
+                        dest="schedule",
+                        action="store",
+                        required=False,
+                        choices=["found", "longest", "shortest"],
+                        help="order of the media files: as found, longest first (keeps parallel workers busy until the end) or shortest first (first results sooner). (Default: found)",
+                        default="found")
+
+    parser.add_argument("--time-budget",
+                        dest="time_budget",
+                        metavar="SECONDS",
+                        action="store",
+                        required=False,
+                        type=lambda x: float(x) if float(x) > 0 else parser.error("time budget must be positive"),
+                        help="only process the media files predicted to finish within this time; the rest is left for the next run. (Default: no budget)",
+                        default=None)
+
+    parser.add_argument("--metrics",
+                        dest="metrics_path",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="append the time spent in every stage, per media file and per run, to PATH as JSON lines; formatting targets counts as write. (Default: disabled)",
+                        default=None)
+
+    parser.add_argument("--prometheus",
+                        dest="prometheus_path",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="write stage time counters to PATH in the Prometheus text format, e.g. for the node exporter textfile collector. (Default: disabled)",
+                        default=None)
+
+    parser.add_argument("--dry-run",
+                        dest="dry_run",
+                        action="store_true",
+                        required=False,
+                        help="plan targets and report pending work without transcribing. (Default: false)",
+                        default=False)
+
+    parser.add_argument("-w", "--workers",
+                        dest="workers",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("workers must be a positive integer"),
+                        help="number of worker processes transcribing files in parallel, each with its own model. (Default: 1)",
+                        default=1)
+
+    parser.add_argument("--threads",
+                        dest="threads",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("threads must be a positive integer"),
+                        help="torch intra-op threads per worker. (Default: CPU cores / workers)",
+                        default=None)
+
+    parser.add_argument("--vad",
+                        dest="vad",
+                        action="store_true",
+                        required=False,
+                        help="transcribe only the audio regions that may contain speech, skipping silence. (Default: false)",
+                        default=False)
+
+    parser.add_argument("--vad-threshold",
+                        dest="vad_threshold",
+                        metavar="DB",
+                        action="store",
+                        required=False,
+                        type=lambda x: float(x) if float(x) < 0 else parser.error("vad threshold must be negative"),
+                        help="energy below the loudest frame, in dB, under which audio is treated as silence. (Default: -40)",
+                        default=-40.0)
+
+    parser.add_argument("--vad-min-silence",
+                        dest="vad_min_silence",
+                        metavar="SECONDS",
+                        action="store",
+                        required=False,
+                        type=lambda x: float(x) if float(x) > 0 else parser.error("vad min silence must be positive"),
+                        help="shortest silence skipped by the VAD, in seconds. (Default: 1.0)",
+                        default=1.0)
+
+    parser.add_argument("--chunk-length",
+                        dest="chunk_length",
+                        metavar="SECONDS",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) >= 30 else parser.error("chunk length must be at least 30 seconds"),
+                        help="split long media at silences into chunks of about this length, transcribed in parallel. (Default: no chunking)",
+                        default=0)
+
+    parser.add_argument("--chunk-workers",
+                        dest="chunk_workers",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("chunk workers must be a positive integer"),
+                        help="worker processes transcribing the chunks of a long media file on CPU. (Default: 2)",
+                        default=2)
+
+    parser.add_argument("--queue-size",
+                        dest="queue_size",
+                        metavar="N",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("queue size must be a positive integer"),
+                        help="media files buffered between pipeline stages (decode, transcribe, translate, write). (Default: 2)",
+                        default=2)
+
+    parser.add_argument("--no-cache",
+                        dest="cache",
+                        action="store_false",
+                        required=False,
+                        help="disable the transcription cache. (Default: enabled)",
+                        default=True)
+
+    parser.add_argument("--cache-dir",
+                        dest="cache_dir",
+                        metavar="PATH",
+                        action="store",
+                        required=False,
+                        type=str,
+                        help="directory of the transcription cache. (Default: ~/.cache/takigrapher/transcriptions)",
+                        default="~/.cache/takigrapher/transcriptions")
+
+    parser.add_argument("--cache-size",
+                        dest="cache_size",
+                        metavar="MB",
+                        action="store",
+                        required=False,
+                        type=lambda x: int(x) if int(x) > 0 else parser.error("cache size must be a positive integer"),
+                        help="maximum size of the transcription cache in megabytes. (Default: 2048)",
+                        default=2048)
+
     # Novos parâmetros adicionados
     parser.add_argument("--temperature",
                         dest="temperature",
@@ -196,8 +502,12 @@ turbo: Fastest variant, high accuracy, resource-efficient.""",
                         help="Initial text to guide transcription (e.g., context or keywords). (Default: None)",
                         default=None)
 
-    args = parser.parse_args()
+    return parser
 
+def build_config(args: argparse.Namespace) -> Transcription:
+    """
+    Builds the configuration from parsed transcription options.
+    """
     config = Transcription()
     config.media_path = args.media_path
     config.model_name = args.model_name
@@ -207,15 +517,57 @@ turbo: Fastest variant, high accuracy, resource-efficient.""",
     config.sourcetype = args.sourcetype
     config.sourcelanguage = args.sourcelanguage
     config.targetlanguage = args.targetlanguage
-    config.targettype = args.targettype
+    config.targettype = ["lrc", "txt", "srt", "vtt", "json", "ndjson"] if "all" in args.targettype else list(dict.fromkeys(args.targettype))
+    config.json_words = args.json_words
     config.targetexists = args.targetexists
     config.targetsuffix = args.targetsuffix
     config.exportall = args.exportall
     config.track = args.track
+    config.dry_run = args.dry_run
+    config.sorted = args.sorted
+    config.schedule = args.schedule
+    config.time_budget = args.time_budget
+    config.metrics_path = args.metrics_path
+    config.prometheus_path = args.prometheus_path
+    config.watch = args.watch
+    config.watch_interval = args.watch_interval
+    config.watch_debounce = args.watch_debounce
+    config.queue_path = args.queue_path
+    config.manifest = args.manifest
+    config.manifest_path = args.manifest_path
+    config.retries = args.retries
+    config.resume = args.resume
+    config.translate_batch_size = args.translate_batch_size
+    config.translate_max_tokens = args.translate_max_tokens
+    config.media_index = args.media_index
+    config.media_index_path = args.media_index_path
+    config.probe_workers = args.probe_workers
+    config.whisper_memory = args.whisper_memory
+    config.marianmt_memory = args.marianmt_memory
+    config.translation_memory = args.translation_memory
+    config.translation_memory_path = args.translation_memory_path
+    config.translation_memory_size = args.translation_memory_size
+    config.workers = args.workers
+    config.threads = args.threads
+    config.queue_size = args.queue_size
+    config.chunk_length = args.chunk_length
+    config.chunk_workers = args.chunk_workers
+    config.vad = args.vad
+    config.vad_threshold = args.vad_threshold
+    config.vad_min_silence = args.vad_min_silence
+    config.cache = args.cache
+    config.cache_dir = args.cache_dir
+    config.cache_size = args.cache_size
     # Atribuir os novos parâmetros ao objeto config
     config.temperature = args.temperature
     config.beam_size = args.beam_size
     config.best_of = args.best_of
     config.prompt = args.prompt
 
-    return config
\ No newline at end of file
+    return config
+
+def parse_args_and_build_config(argv: list = None) -> Transcription:
+    """
+    Parses the command line (or argv) and builds the configuration.
+    """
+    return build_config(build_parser().parse_args(argv))
\ No newline at end of file
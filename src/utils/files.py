@@ -1,61 +1,208 @@
 import os
+import json
 import subprocess
+import tempfile
+import threading
+import numpy as np
 from utils import log
+from models import MediaInfo
 
-def list_media_files(path: str, sourcetype: str = None) -> list:
+MEDIA_EXTENSIONS = (
+    ".mp3", ".wav", ".m4a", ".flac", ".aac", ".ogg", ".wma",
+    ".mp4", ".mkv", ".webm", ".opus", ".mov", ".avi"
+)
+
+def is_media_file(path: str, sourcetype: str = None) -> bool:
     """
-    Returns a list of absolute paths to supported media files found recursively in the given folder.
+    Checks the extension of a file against the supported media types, or only sourcetype if given.
     """
-    supported_exts = (
-        ".mp3", ".wav", ".m4a", ".flac", ".aac", ".ogg", ".wma",
-        ".mp4", ".mkv", ".webm", ".opus", ".mov", ".avi"
-    )
-    if sourcetype:
-        supported_exts = tuple(f".{sourcetype.lower()}")
+    extensions = (f".{sourcetype.lower()}",) if sourcetype else MEDIA_EXTENSIONS
+    return path.lower().endswith(extensions)
 
+def iter_media_files(path: str, sourcetype: str = None, sort: bool = False):
+    """
+    Yields absolute paths to supported media files found recursively in the given folder, as they are found.
+    With sort, every folder is listed in name order, so the files come in a stable order.
+    """
     abs_folder = os.path.abspath(path)
-    media_files = []
 
     # Check if the folder is a file
     if os.path.isfile(abs_folder):
         log(f"Path is a file, not a folder: {abs_folder}")
-        if abs_folder.lower().endswith(supported_exts):
-            media_files.append(abs_folder)
+        if is_media_file(abs_folder, sourcetype):
+            yield abs_folder
         else:
             log(f"File is not a supported media file: {abs_folder}")
-        return media_files
-    else:
-        if not os.path.exists(abs_folder):
-            log(f"Folder does not exist: {abs_folder}")
-            return media_files
-
-    # Iterate over the path
-    for root, _, files in os.walk(abs_folder):
-        for file in files:
-            if file.lower().endswith(supported_exts):
-                media_files.append(os.path.join(root, file))
-
-    media_files.sort()
-    return media_files
-
-def count_audio_tracks(filename):
+        return
+    if not os.path.exists(abs_folder):
+        log(f"Folder does not exist: {abs_folder}")
+        return
+
+    # Walk the tree depth first, one folder listing at a time
+    stack = []
+
+    def enter(folder: str) -> bool:
+        try:
+            scan = os.scandir(folder)
+        except OSError as e:
+            log(f"WARNING: Cannot list folder {folder}: {e}")
+            return False
+        if sort:
+            with scan:
+                stack.append(iter(sorted(scan, key=lambda entry: entry.name)))
+        else:
+            stack.append(scan)
+        return True
+
+    enter(abs_folder)
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            done = stack.pop()
+            if hasattr(done, "close"):
+                done.close()
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                enter(entry.path)
+            elif entry.is_file() and is_media_file(entry.name, sourcetype):
+                yield entry.path
+        except OSError:
+            continue
+
+def list_media_files(path: str, sourcetype: str = None) -> list:
+    """
+    Returns a sorted list of absolute paths to supported media files found recursively in the given folder.
+    """
+    return sorted(iter_media_files(path, sourcetype))
+
+def write_text_atomic(path: str, blocks, buffer_size: int = 256 * 1024):
+    """
+    Writes text to path through a temporary file in the same folder that replaces path
+    in one step, so an interrupted write never leaves a partial file behind.
+    blocks is a string or an iterable of strings (such as a formatter generator), written
+    as they come through a buffer of buffer_size bytes, so the whole text is never in memory.
+    """
+    if isinstance(blocks, str):
+        blocks = (blocks,)
+    folder, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(folder, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=buffer_size) as f:
+            for block in blocks:
+                f.write(block)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def probe_media(filename: str) -> MediaInfo:
+    """
+    Reads the format and every stream of a media file with a single ffprobe call.
+    Returns duration, codecs, sample rates, channels and languages of all streams.
+    """
     cmd = [
-        "ffprobe", "-v", "error", "-select_streams", "a",
-        "-show_entries", "stream=index", "-of", "csv=p=0", filename
+        "ffprobe", "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", filename
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return len(result.stdout.strip().splitlines())
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    probe = json.loads(result.stdout or "{}")
+    media_format = probe.get('format', {})
+    st = os.stat(filename)
 
-def extract_audio_track(input_path: str, output_path: str, track: int):
+    streams = []
+    for stream in probe.get('streams', []):
+        streams.append({
+            'index': stream.get('index'),
+            'codec_type': stream.get('codec_type'),
+            'codec_name': stream.get('codec_name'),
+            'sample_rate': int(stream['sample_rate']) if stream.get('sample_rate') else None,
+            'channels': stream.get('channels'),
+            'duration': float(stream['duration']) if stream.get('duration') else None,
+            'language': stream.get('tags', {}).get('language')
+        })
+
+    return MediaInfo(path=os.path.abspath(filename),
+                     size=st.st_size,
+                     mtime=st.st_mtime,
+                     duration=float(media_format['duration']) if media_format.get('duration') else None,
+                     format_name=media_format.get('format_name'),
+                     streams=streams)
+
+def decode_audio_track(input_path: str, track: int = 1, sample_rate: int = 16000) -> np.ndarray:
     """
-    Extracts the specified audio track (1=first, 2=second, 3=third, etc) from a media file using ffmpeg.
+    Decodes the specified audio track (1=first, 2=second, 3=third, etc) of a media file to mono float32 PCM.
+    A single ffmpeg process streams the samples through a pipe straight into a NumPy buffer, without temporary files.
     """
     cmd = [
         "ffmpeg",
-        "-y",
+        "-nostdin",
+        "-v", "error",
         "-i", input_path,
-        "-map", f"0:{track}",  # track=1 para 0:1, track=2 para 0:2, etc.
-        output_path
+        "-map", f"0:a:{track - 1}",
+        "-f", "f32le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-"
     ]
-    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-    return f"{result.stdout.strip()}\n{result.stderr.strip()}"
+    # stderr goes to a file: a pipe could fill up with warnings while stdout is read, blocking ffmpeg
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+        buffer = bytearray()
+        while True:
+            chunk = process.stdout.read(1 << 20)
+            if not chunk:
+                break
+            buffer += chunk
+        returncode = process.wait()
+        errors.seek(0)
+        stderr = errors.read().decode(errors="replace")
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode track {track}: {stderr.strip()}")
+    # bytearray keeps the samples writable, so torch can use them without another copy
+    return np.frombuffer(buffer, dtype=np.float32)
+
+def decode_audio_tracks(input_path: str, tracks: list, sample_rate: int = 16000) -> list:
+    """
+    Decodes several audio tracks of a media file in a single ffmpeg pass, so the container is read only once.
+    Every track is written to its own pipe and read into its own NumPy buffer.
+    Returns one float32 array per track, in the order of tracks.
+    """
+    if len(tracks) == 1 or os.name == "nt":
+        # Extra pipe file descriptors cannot be passed to ffmpeg on Windows
+        return [decode_audio_track(input_path, track, sample_rate) for track in tracks]
+
+    pipes = [os.pipe() for _ in tracks]
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", input_path]
+    for track, (_, write_fd) in zip(tracks, pipes):
+        cmd += ["-map", f"0:a:{track - 1}", "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), f"pipe:{write_fd}"]
+
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   pass_fds=[write_fd for _, write_fd in pipes])
+    finally:
+        # Only ffmpeg keeps the write ends open, so readers see EOF when it finishes
+        for _, write_fd in pipes:
+            os.close(write_fd)
+
+    buffers = [bytearray() for _ in tracks]
+
+    def drain(read_fd: int, buffer: bytearray):
+        with os.fdopen(read_fd, 'rb') as pipe:
+            while True:
+                chunk = pipe.read(1 << 20)
+                if not chunk:
+                    break
+                buffer += chunk
+
+    readers = [threading.Thread(target=drain, args=(read_fd, buffer), daemon=True)
+               for (read_fd, _), buffer in zip(pipes, buffers)]
+    for reader in readers:
+        reader.start()
+    stderr = process.stderr.read().decode(errors="replace")
+    for reader in readers:
+        reader.join()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed to decode tracks {tracks}: {stderr.strip()}")
+    return [np.frombuffer(buffer, dtype=np.float32) for buffer in buffers]
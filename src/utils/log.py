@@ -24,3 +24,9 @@ def print_progress_bar(progress: float, total: float, length: int = 20, prefix:
     print(f"\r{prefix} [{bar}] {int(percent * 100)}%{lf}", end='', flush=True)
     if percent == 1.0:
         print()
+
+def format_duration(seconds: float) -> str:
+    """
+    Formats a duration in seconds as XhYYmZZs.
+    """
+    return f"{int(seconds // 3600)}h{int(seconds % 3600 // 60):02d}m{int(seconds % 60):02d}s"
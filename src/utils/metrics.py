@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from .files import write_text_atomic
+
+# Disabled spans cost one flag check: span() returns this shared no-op context
+_NOOP = nullcontext()
+
+_lock = threading.Lock()
+_local = threading.local()
+_state = {'enabled': False, 'jsonl_path': None, 'prometheus_path': None}
+_totals = {}
+_files = {}
+_finished = []
+_outcomes = {}
+
+class _Span:
+    """
+    Times a block on the monotonic clock and records it under name, for the media file
+    given or else the one of the enclosing span on this thread.
+    """
+    __slots__ = ('name', 'media', 'start', 'outer')
+
+    def __init__(self, name: str, media: str = None):
+        self.name = name
+        self.media = media
+
+    def __enter__(self):
+        self.outer = getattr(_local, 'media', None)
+        if self.media is None:
+            self.media = self.outer
+        _local.media = self.media
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.name, time.perf_counter() - self.start, self.media)
+        _local.media = self.outer
+        return False
+
+def configure_metrics(jsonl_path: str = None, prometheus_path: str = None, enabled: bool = None):
+    """
+    Turns span recording on when a JSON lines or Prometheus output is given, or when enabled
+    (worker processes record spans and hand them to the parent, which writes the outputs).
+    """
+    with _lock:
+        _state['jsonl_path'] = os.path.abspath(os.path.expanduser(jsonl_path)) if jsonl_path else None
+        _state['prometheus_path'] = os.path.abspath(os.path.expanduser(prometheus_path)) if prometheus_path else None
+        _state['enabled'] = bool(jsonl_path or prometheus_path) if enabled is None else enabled
+
+def metrics_enabled() -> bool:
+    return _state['enabled']
+
+def span(name: str, media: str = None):
+    """
+    Returns a context manager timing a stage, or a no-op one when metrics are disabled.
+    Usage: with span("extract", media_file): ...
+    """
+    return _Span(name, media) if _state['enabled'] else _NOOP
+
+def record_span(name: str, elapsed: float, media: str = None):
+    """
+    Adds a timed stage to the totals and, with a media file, to that file's record.
+    """
+    with _lock:
+        total = _totals.get(name)
+        if total is None:
+            total = _totals[name] = {'count': 0, 'seconds': 0.0, 'max': 0.0}
+        total['count'] += 1
+        total['seconds'] += elapsed
+        total['max'] = max(total['max'], elapsed)
+        if media is not None:
+            spans = _files.setdefault(media, {})
+            spans[name] = spans.get(name, 0.0) + elapsed
+
+def finish_file(media: str, status: str = 'done'):
+    """
+    Closes the record of a media file (done, failed or incomplete) and writes it as a JSON line,
+    or keeps it for the parent process.
+    """
+    if not _state['enabled']:
+        return
+    with _lock:
+        spans = _files.pop(media, {})
+        _outcomes[status] = _outcomes.get(status, 0) + 1
+    record = {
+        'type': 'file',
+        'time': round(time.time(), 3),
+        'media': media,
+        'status': status,
+        'spans': {name: round(seconds, 4) for name, seconds in spans.items()}
+    }
+    if _state['jsonl_path']:
+        write_metrics_line(record)
+    else:
+        with _lock:
+            _finished.append(record)
+
+def metrics_snapshot() -> dict:
+    """
+    Returns and clears the totals, outcomes and finished file records of this process,
+    for a worker process to hand them to its parent.
+    """
+    with _lock:
+        snapshot = {'totals': dict(_totals), 'outcomes': dict(_outcomes), 'files': list(_finished)}
+        _totals.clear()
+        _finished.clear()
+        _outcomes.clear()
+    return snapshot
+
+def merge_metrics(snapshot: dict):
+    """
+    Adds the metrics of a worker process to this process and writes its file records,
+    with the spans this process recorded for the same files (probes run in the parent).
+    """
+    with _lock:
+        for record in snapshot['files']:
+            for name, seconds in _files.pop(record['media'], {}).items():
+                record['spans'][name] = round(record['spans'].get(name, 0.0) + seconds, 4)
+        for name, other in snapshot['totals'].items():
+            total = _totals.setdefault(name, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            total['count'] += other['count']
+            total['seconds'] += other['seconds']
+            total['max'] = max(total['max'], other['max'])
+        for outcome, count in snapshot['outcomes'].items():
+            _outcomes[outcome] = _outcomes.get(outcome, 0) + count
+    if _state['jsonl_path']:
+        for record in snapshot['files']:
+            write_metrics_line(record)
+
+def write_metrics_line(record: dict):
+    """
+    Appends a record to the JSON lines output.
+    """
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _lock:
+        with open(_state['jsonl_path'], 'a', encoding='utf-8') as f:
+            f.write(line)
+
+def prometheus_lines(totals: dict, outcomes: dict):
+    """
+    Yields the totals in the Prometheus text exposition format.
+    """
+    yield "# HELP takigrapher_span_seconds_total Time spent in each stage, in seconds.\n"
+    yield "# TYPE takigrapher_span_seconds_total counter\n"
+    for name, total in sorted(totals.items()):
+        yield f'takigrapher_span_seconds_total{{span="{name}"}} {total["seconds"]:.6f}\n'
+    yield "# HELP takigrapher_span_count_total Number of times each stage ran.\n"
+    yield "# TYPE takigrapher_span_count_total counter\n"
+    for name, total in sorted(totals.items()):
+        yield f'takigrapher_span_count_total{{span="{name}"}} {total["count"]}\n'
+    yield "# HELP takigrapher_span_seconds_max Longest single run of each stage, in seconds.\n"
+    yield "# TYPE takigrapher_span_seconds_max gauge\n"
+    for name, total in sorted(totals.items()):
+        yield f'takigrapher_span_seconds_max{{span="{name}"}} {total["max"]:.6f}\n'
+    yield "# HELP takigrapher_media_files_total Media files processed, by outcome.\n"
+    yield "# TYPE takigrapher_media_files_total counter\n"
+    for outcome, count in sorted(outcomes.items()):
+        yield f'takigrapher_media_files_total{{status="{outcome}"}} {count}\n'
+
+def write_metrics(wall: float = None, close_files: bool = True):
+    """
+    Writes the totals as a JSON line and replaces the Prometheus text file, so a collector never
+    reads a partial file. With close_files, media files left unfinished (probed but never
+    processed) are recorded as incomplete first.
+    """
+    if not _state['enabled']:
+        return
+    if close_files:
+        for media in list(_files):
+            finish_file(media, 'incomplete')
+    with _lock:
+        totals = {name: dict(total) for name, total in _totals.items()}
+        outcomes = dict(_outcomes)
+    if _state['jsonl_path']:
+        record = {
+            'type': 'run',
+            'time': round(time.time(), 3),
+            'wall': round(wall, 4) if wall is not None else None,
+            'files': outcomes,
+            'spans': {name: {'count': total['count'], 'seconds': round(total['seconds'], 4), 'max': round(total['max'], 4)}
+                      for name, total in sorted(totals.items())}
+        }
+        write_metrics_line(record)
+    if _state['prometheus_path']:
+        write_text_atomic(_state['prometheus_path'], prometheus_lines(totals, outcomes))
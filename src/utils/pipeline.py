@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from utils import log
+
+_DONE = object()
+
+class Stage:
+    """
+    A pipeline stage: func takes an item and returns the item for the next stage,
+    a list of items to pass on one by one, or None if the item failed.
+    """
+
+    def __init__(self, name: str, func):
+        self.name = name
+        self.func = func
+        self.items = 0
+        self.failed = 0
+        self.busy = 0.0
+
+    def stats(self, wall: float) -> dict:
+        return {
+            'name': self.name,
+            'items': self.items,
+            'failed': self.failed,
+            'busy': self.busy,
+            'utilization': self.busy / wall if wall > 0 else 0.0
+        }
+
+def run_pipeline(items, stages: list, queue_size: int = 2, stop_on_failure: bool = True) -> dict:
+    """
+    Runs items through the stages, each stage on its own thread, connected by bounded queues.
+    While one stage works on item N, the previous stage can already work on item N+1.
+    Returns the wall time and per-stage statistics.
+    If the items iterator raises, the items already fed are finished and the error is re-raised.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    feed_error = []
+
+    def feed():
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                queues[0].put(item)
+        except Exception as e:
+            log(f"ERROR: Pipeline input failed: {e}")
+            feed_error.append(e)
+        finally:
+            # The stages stop on _DONE, so it must be sent even when the input fails
+            queues[0].put(_DONE)
+
+    def work(index: int, stage: Stage):
+        input_queue = queues[index]
+        output_queue = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = input_queue.get()
+            if item is _DONE:
+                if output_queue is not None:
+                    output_queue.put(_DONE)
+                return
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                log(f"ERROR: Pipeline stage {stage.name} failed: {e}")
+                result = None
+            stage.busy += time.perf_counter() - start
+            stage.items += 1
+            if result is None:
+                stage.failed += 1
+                if stop_on_failure:
+                    stop.set()
+                continue
+            if output_queue is not None:
+                for output in (result if isinstance(result, list) else [result]):
+                    output_queue.put(output)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+    threads += [threading.Thread(target=work, args=(i, stage), name=f"pipeline-{stage.name}", daemon=True)
+                for i, stage in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    if feed_error:
+        raise feed_error[0]
+
+    return {
+        'wall': wall,
+        'stopped': stop.is_set(),
+        'stages': [stage.stats(wall) for stage in stages]
+    }
+
+def log_pipeline_stats(stats: dict):
+    """
+    Logs the utilization of every stage and points out the bottleneck.
+    """
+    stages = stats['stages']
+    if not stages:
+        return
+    log(f"Pipeline wall time: {stats['wall']:.2f}s")
+    for stage in stages:
+        log(f"Pipeline stage {stage['name']}: {stage['items']} items, {stage['failed']} failed, busy {stage['busy']:.2f}s ({stage['utilization']:.0%})")
+    bottleneck = max(stages, key=lambda stage: stage['utilization'])
+    log(f"Pipeline bottleneck: {bottleneck['name']} ({bottleneck['utilization']:.0%} busy)")
@@ -1,109 +1,573 @@
+import io
 import os
-from utils import log
-from models import Transcription
-from providers import load_whisper_model
-from actions import transcribe_media, transform_media, translate_media
-
-def process_media(config : Transcription, media_files: list):
-    """
-    Processes a list of media files, performing transcription, translation, or other actions as configured.
-    """
-
-    for ntx, media_file_path in enumerate(media_files):
-        # Load model
-        log(f"Loading Whisper model: {config.model_name}")
-        config.model = load_whisper_model(config)
-        if config.model is None:
-            log(f"Failed to load model: {config.model_name}")
-            return
-        log(f"Model loaded: {config.model_name}")
-
-        log(f"Processing media file {ntx + 1}/{len(media_files)}")
-        # Transcribe media file
-        text_transcription : tuple[str, str] = transcribe_media(config, media_file_path, config.track)
-        if text_transcription is None:
-            log(f"Failed to transcribe media file: {media_file_path}")
-            break
-        else:
-          log(f"Transcription completed for {media_file_path}")
-
-        if 'segments' not in text_transcription:
-            log(f"ERROR: Transcription failed {media_file_path}: no segments found")
-            break
-
-        detected_language = text_transcription['language']
-        if detected_language is None:
-            log(f"ERROR: Transcription failed {media_file_path}: no language detected")
-            break
-        log(f"Detected language: {detected_language}")
-
-        # Check if translation is needed
-        text_translated : tuple[str, str] = None
-        if config.targetlanguage is not None:
-            # Check if the source language is set
-            if config.sourcelanguage is None:
-                log(f"Source language not set. Assuming detected language: {detected_language} as source language.")
-                config.sourcelanguage = detected_language
-            if not config.targetlanguage == config.sourcelanguage:
-              # Translate text
-              log(f"Translating to {config.targetlanguage}")
-              text_translated = translate_media(config, text_transcription)
-              if text_translated is None:
-                  log(f"Failed to translate text for {media_file_path}")
-                  break
-              else:
-                  log(f"Translation completed for {media_file_path}")
-
-        # Convert transcription/translation to the desired format
-        target_text = text_translated if text_translated is not None else text_transcription
-        target_text_type = 'translation' if text_translated is not None else 'transcription'
-        json_transformed : str = transform_media(config, target_text, target_text_type)
-
-        jobExport = []
-        if config.exportall:
-            if target_text_type == 'translation': jobExport.append('translation')
-            jobExport.append('transcription')
-        else:
-            if config.targetlanguage is not None: jobExport.append('translation')
-            else: jobExport.append('transcription')
-
-        for job in jobExport:
-            if config.exportall:
-                if job == 'translation':
-                    lng = config.targetlanguage
-                elif job == 'transcription':
-                    lng = detected_language if config.sourcelanguage is None else config.sourcelanguage
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import replace
+from utils import log, format_duration, suppress_warnings, iter_media_files, write_text_atomic, Stage, run_pipeline, log_pipeline_stats
+from utils import configure_metrics, span, finish_file, metrics_snapshot, merge_metrics, write_metrics
+from models import Transcription, MediaJob
+from providers import whisper_registry, marianmt_registry, SAMPLE_RATE
+from jobs import JobQueue, MediaWatcher, get_job_manifest
+from cache import hash_file, opened_transcription_caches, opened_translation_memories, opened_media_indexes, close_media_indexes, merge_stats, log_cache_stats
+from actions import validate_media_file, transcription_params, lookup_transcription, decode_media_tracks, run_transcription, vad_stats, log_vad_stats
+from actions import transform_media, translate_media, shutdown_chunk_pool, schedule_groups, plan_media, resolve_targets, report_plan, prefetch_metadata
+
+def process_media(config : Transcription, media_files):
+    """
+    Processes media files, performing transcription, translation, or other actions as configured.
+    media_files may be a generator: files are planned and processed as they are found.
+    """
+
+    # A dry run plans every file before reporting
+    if config.dry_run:
+        plans = plan_media(config, list(media_files))
+        prefetch_metadata(config, plans)
+        report_plan(config, plans, wait_for_metadata=True)
+        log("Dry run: nothing will be processed")
+        return
+
+    configure_metrics(config.metrics_path, config.prometheus_path)
+    run_start = time.perf_counter()
+
+    # Calibrate the schedule on earlier runs before this run resets its own records
+    scheduled = config.schedule != 'found' or config.time_budget
+    rtf = estimate_rtf(config) if scheduled else None
+
+    # Resume an interrupted run from the job manifest
+    run, resumed = None, False
+    if config.manifest:
+        run, resumed = get_job_manifest(config.manifest_path).start_run(manifest_params(config))
+        if resumed:
+            log(f"Resuming run {run}")
+
+    totals = {'found': 0, 'pending': 0}
+    groups = pending_groups(config, media_files, run, resumed, totals)
+
+    # Ordering by duration or fitting a time budget needs every file planned and probed first
+    makespan = None
+    if scheduled:
+        groups, makespan = schedule_groups(config, list(groups), rtf)
+
+    start = time.perf_counter()
+    if config.workers > 1:
+        process_media_parallel(config, groups, run)
+    else:
+        set_torch_threads(config.threads)
+        # Discovery, decode, transcribe, translate and write run on their own threads so that
+        # file N+1 is found and decoded while file N is transcribed.
+        # The model is loaded on the first cache miss and kept warm for every file
+        log("Processing media files as they are found")
+        jobs = ([MediaJob(plan=plan, config=config, run=run) for plan in group] for group in groups)
+        try:
+            stats = run_pipeline(jobs, [Stage(name, func) for name, func in STAGES], config.queue_size)
+        finally:
+            shutdown_chunk_pool()
+        log_pipeline_stats(stats)
+        whisper_registry.log_stats()
+        marianmt_registry.log_stats()
+        log_run_cache_stats([cache_stats()])
+        log_vad_stats([vad_stats()])
+
+    if makespan is not None:
+        log(f"Schedule: predicted makespan {format_duration(makespan)}, actual {format_duration(time.perf_counter() - start)}")
+    if totals['found'] == 0:
+        log(f"No media files found in {config.media_path}")
+    elif totals['pending'] == 0:
+        log("All targets already exist. Nothing to do.")
+    log(f"Found {totals['found']} media files, {totals['pending']} needed processing")
+    if run is not None:
+        finish_manifest_run(config, run)
+    write_metrics(time.perf_counter() - run_start)
+    close_media_indexes()
+
+def estimate_rtf(config : Transcription) -> float:
+    """
+    Returns the processing time per second of audio of the model, measured by earlier runs in the job manifest.
+    Without history, assumes real time.
+    """
+    rtf = get_job_manifest(config.manifest_path).estimate_rtf(config.model_name) if config.manifest else None
+    if rtf is None:
+        log(f"Schedule: no timed runs of model {config.model_name} yet, assuming real time")
+        return 1.0
+    return rtf
+
+def pending_groups(config : Transcription, media_files, run: str = None, resumed: bool = False, totals: dict = None):
+    """
+    Plans media files as they are found and yields the pending plans of every file, grouped by file.
+    Plans already written or failed too often by an interrupted run are left out.
+    """
+    totals = totals if totals is not None else {'found': 0, 'pending': 0}
+    manifest = get_job_manifest(config.manifest_path) if run is not None else None
+    for media_file in media_files:
+        totals['found'] += 1
+        plans = plan_media(config, [media_file])
+        pending = [plan for plan in plans if plan.pending(config.targetexists)]
+        if not pending:
+            log(f"Skipping media file with all targets present: {media_file}")
+
+        if manifest is not None:
+            states = manifest.add(run, plans, done=[plan for plan in plans if not plan.pending(config.targetexists)])
+            if resumed:
+                resumable = []
+                for plan in pending:
+                    state, attempts = states.get((os.path.abspath(plan.media_file), plan.track), ('pending', 0))
+                    if state == 'written':
+                        log(f"Skipping media file written by the interrupted run: {plan.media_file}")
+                    elif state == 'failed' and attempts > config.retries:
+                        log(f"Skipping media file that failed {attempts} times: {plan.media_file}")
+                    else:
+                        resumable.append(plan)
+                pending = resumable
+
+        if pending:
+            totals['pending'] += 1
+            prefetch_metadata(config, pending)
+            yield pending
+    if manifest is not None:
+        manifest.mark_discovered(run)
+
+def manifest_params(config : Transcription) -> dict:
+    """
+    Returns the parameters that identify a batch run in the job manifest.
+    """
+    return {
+        'media_path': os.path.abspath(config.media_path),
+        'sourcetype': config.sourcetype,
+        'model_name': config.model_name,
+        'track': config.track,
+        'targettype': config.targettype,
+        'json_words': config.json_words,
+        'targetexists': config.targetexists,
+        'targetsuffix': config.targetsuffix,
+        'targetlanguage': config.targetlanguage,
+        'exportall': config.exportall,
+        **transcription_params(config)
+    }
+
+def resume_media_files(config : Transcription) -> list:
+    """
+    Returns the media files discovered by the interrupted run of this configuration,
+    or None if there is no run to resume.
+    """
+    if not config.manifest:
+        return None
+    return get_job_manifest(config.manifest_path).resumable_files(manifest_params(config))
+
+def finish_manifest_run(config : Transcription, run: str):
+    """
+    Closes the run in the job manifest and logs its outcome.
+    """
+    manifest = get_job_manifest(config.manifest_path)
+    counts, failed = manifest.finish_run(run, config.retries)
+    log(f"Run {run}: {', '.join(f'{count} {state}' for state, count in sorted(counts.items()))}")
+    timings = manifest.timings(run)
+    log(f"Run {run} stage times: {', '.join(f'{stage} {elapsed:.2f}s' for stage, elapsed in timings.items())}")
+    for path, track, attempts, error in failed:
+        log(f"ERROR: Gave up on {path} (track {track}) after {attempts} failed attempts: {error}")
+    if sum(counts.values()) > counts.get('written', 0) + len(failed):
+        log("Run not finished: rerun the same command to resume it")
+    elif failed:
+        log(f"Run {run} finished with {len(failed)} failed jobs; the next run will try them again")
+
+def tracked_stage(name: str, func):
+    """
+    Wraps a pipeline stage to time it as a metrics span and to record the state and time
+    of its jobs in the job manifest.
+    """
+    states = {'transcribe': 'transcribed', 'translate': 'translated', 'write': 'written'}
+
+    def run(item):
+        jobs = item if isinstance(item, list) else [item]
+        media = os.path.abspath(jobs[0].plan.media_file)
+        try:
+            with span(f"{name}_stage", media):
+                result = record(item, jobs)
+        except Exception:
+            finish_file(media, 'failed')
+            raise
+        if result is None:
+            finish_file(media, 'failed')
+        elif name == 'decode':
+            for job in jobs[:-1]:
+                job.last_track = False
+        elif name == 'write' and jobs[-1].last_track:
+            finish_file(media)
+        return result
+
+    def record(item, jobs: list):
+        if jobs[0].run is None:
+            return func(item)
+        manifest = get_job_manifest(jobs[0].config.manifest_path)
+        start = time.perf_counter()
+        try:
+            result = func(item)
+        except Exception as e:
+            for job in jobs:
+                manifest.record(job.run, job.plan.media_file, job.plan.track, state='failed', error=f"{name}: {e}")
+            raise
+        elapsed = (time.perf_counter() - start) / len(jobs)
+        for job in jobs:
+            if result is None:
+                manifest.record(job.run, job.plan.media_file, job.plan.track, state='failed', stage=name, elapsed=elapsed, error=f"{name} failed")
             else:
-                src_lng = detected_language if config.sourcelanguage is None else f"{config.sourcelanguage}"
-                src_lng = ""if not config.targetsuffix else f"{src_lng}"
-                tgt_lng = ""if config.targetlanguage is None else f"{config.targetlanguage}"
-                tgt_lng = ""if not config.targetsuffix else f"{tgt_lng}"
-                lng = tgt_lng if tgt_lng else src_lng
-
-            file_path_alongside_media = os.path.splitext(media_file_path)[0] + (f".{lng}" if lng else "") + f".{config.targettype}"
-            tgt_abs_file_path = os.path.abspath(file_path_alongside_media)
-
-            # Check if the output file already exists
-            match config.targetexists:
-                case 'skip':
-                    if os.path.exists(tgt_abs_file_path):
-                        log(f"Skipping existing file: {tgt_abs_file_path}")
-                        return
-                case 'rename':
-                    base, ext = os.path.splitext(tgt_abs_file_path)
-                    i = 0
-                    while os.path.exists(tgt_abs_file_path):
-                        i += 1
-                        tgt_abs_file_path = f"{base}_{i}{ext}"
-                    if i > 0:
-                        log(f"Avoiding collision by renaming existing file to: {tgt_abs_file_path}")
-                case 'overwrite':
-                    if os.path.exists(tgt_abs_file_path):
-                      log(f"Overwriting existing file: {tgt_abs_file_path}")
-                    pass
-
-            log("Writing to file...")
-            with open(tgt_abs_file_path, 'w', encoding='utf-8') as f:
-                for line in json_transformed[job]:
-                    f.write(line)
-            log(f"File written: {tgt_abs_file_path}")
+                state = states.get(name)
+                if name == 'translate' and job.translation is None:
+                    state = None
+                duration = len(job.audio) / SAMPLE_RATE if name == 'decode' and job.audio is not None else None
+                manifest.record(job.run, job.plan.media_file, job.plan.track, state=state, stage=name, elapsed=elapsed, duration=duration)
+        return result
+    return run
+
+def watch_media(config : Transcription):
+    """
+    Keeps the models warm and processes new or changed media files under the media folder as they land.
+    Files are pushed onto a persistent queue, so files queued when the watcher stops are processed on the next start.
+    """
+    if not os.path.isdir(config.media_path):
+        log(f"ERROR: Watch mode needs a folder: {config.media_path}")
+        return
+
+    configure_metrics(config.metrics_path, config.prometheus_path)
+    queue = JobQueue(config.queue_path)
+    watcher = MediaWatcher(config.media_path, config.sourcetype, config.watch_interval, config.watch_debounce)
+
+    # Catch up with what changed while the watcher was not running. With overwrite or rename
+    # every target is pending, so files already processed in their current version are left out
+    queued = sum(queue.push(media_file, force=True)
+                 for media_file in iter_media_files(config.media_path, config.sourcetype)
+                 if not (config.targetexists != 'skip' and queue.done(media_file))
+                 and any(plan.pending(config.targetexists) for plan in plan_media(config, [media_file])))
+    log(f"Watching for media files: {queued} queued, {queue.counts().get('queued', 0)} waiting")
+
+    set_torch_threads(config.threads)
+    try:
+        while True:
+            media_file = queue.pop()
+            if media_file is None:
+                for media_file in watcher.wait():
+                    if queue.push(media_file):
+                        log(f"Queued media file: {media_file}")
+                continue
+            try:
+                processed = process_queued_file(config, media_file)
+            except Exception as e:
+                log(f"ERROR: Processing failed {media_file}: {e}")
+                processed = False
+            queue.finish(media_file, processed)
+            write_metrics(close_files=False)
+            for media_file in watcher.wait(0):
+                if queue.push(media_file):
+                    log(f"Queued media file: {media_file}")
+    except KeyboardInterrupt:
+        log("Stopping watch mode")
+    finally:
+        watcher.close()
+        close_media_indexes()
+        shutdown_chunk_pool()
+        whisper_registry.log_stats()
+        marianmt_registry.log_stats()
+        log_run_cache_stats([cache_stats()])
+        log_vad_stats([vad_stats()])
+        write_metrics()
+
+def process_queued_file(config : Transcription, media_file: str) -> bool:
+    """
+    Plans and processes a single queued media file on the warm models.
+    Returns False if the file could not be processed.
+    """
+    plans = plan_media(config, [media_file])
+    pending = [plan for plan in plans if plan.pending(config.targetexists)]
+    if not pending:
+        log(f"Skipping media file with all targets present: {media_file}")
+        return True
+    log(f"Processing queued media file: {media_file}")
+    return process_media_file(config, pending)
+
+def decode_stage(jobs: list) -> list:
+    """
+    Looks up the transcription cache for every track of a media file and, on a miss,
+    decodes the missing tracks in a single pass over the file.
+    """
+    config = jobs[0].config
+    media_file_path = os.path.abspath(jobs[0].plan.media_file)
+    if not validate_media_file(media_file_path):
+        return None
+
+    # Hash the file once for all its tracks
+    content_hash = None
+    if config.cache:
+        with span("hash"):
+            content_hash = hash_file(media_file_path)
+    for job in jobs:
+        job.transcription, job.cache_key = lookup_transcription(config, media_file_path, job.plan.track, content_hash)
+    misses = [job for job in jobs if job.transcription is None]
+    if misses:
+        audios = decode_media_tracks(config, media_file_path, [job.plan.track for job in misses])
+        if audios is None:
+            log(f"Failed to decode media file: {media_file_path}")
+            return None
+        for job, audio in zip(misses, audios):
+            job.audio = audio
+    return jobs
+
+def transcribe_stage(job: MediaJob) -> MediaJob:
+    """
+    Transcribes the decoded audio on the warm Whisper model, unless the result came from the cache.
+    """
+    config = job.config
+    media_file_path = job.plan.media_file
+
+    # Transcribe media file
+    if job.transcription is None:
+        job.transcription = run_transcription(config, os.path.abspath(media_file_path), job.audio, job.cache_key)
+        job.audio = None
+    text_transcription : tuple[str, str] = job.transcription
+    if text_transcription is None:
+        log(f"Failed to transcribe media file: {media_file_path}")
+        return None
+    else:
+      log(f"Transcription completed for {media_file_path}")
+
+    if 'segments' not in text_transcription:
+        log(f"ERROR: Transcription failed {media_file_path}: no segments found")
+        return None
+
+    job.detected_language = text_transcription['language']
+    if job.detected_language is None:
+        log(f"ERROR: Transcription failed {media_file_path}: no language detected")
+        return None
+    log(f"Detected language: {job.detected_language}")
+    return job
+
+def translate_stage(job: MediaJob) -> MediaJob:
+    """
+    Translates the transcription when a different target language is requested.
+    """
+    config = job.config
+    media_file_path = job.plan.media_file
+    detected_language = job.detected_language
+
+    # Check if translation is needed
+    file_config = config
+    if config.targetlanguage is not None:
+        # Check if the source language is set
+        if config.sourcelanguage is None:
+            log(f"Source language not set. Assuming detected language: {detected_language} as source language.")
+            file_config = replace(config, sourcelanguage=detected_language)
+        if not file_config.targetlanguage == file_config.sourcelanguage:
+          # Translate text
+          log(f"Translating to {file_config.targetlanguage}")
+          job.translation = translate_media(file_config, job.transcription)
+          if job.translation is None:
+              log(f"Failed to translate text for {media_file_path}")
+              return None
+          else:
+              log(f"Translation completed for {media_file_path}")
+    return job
+
+def transform_job(job: MediaJob) -> dict:
+    """
+    Converts the translation (or else the transcription) of a job to every target format.
+    Every output is a generator of text blocks, formatted as it is written.
+    """
+    target_text = job.translation if job.translation is not None else job.transcription
+    target_text_type = 'translation' if job.translation is not None else 'transcription'
+    job.transformed = transform_media(job.config, target_text, target_text_type)
+    return job.transformed
+
+def write_stage(job: MediaJob) -> MediaJob:
+    """
+    Converts the transcription/translation to every target format and writes the target files.
+    """
+    config = job.config
+    media_file_path = job.plan.media_file
+
+    # Convert transcription/translation to the desired format
+    json_transformed : dict = transform_job(job)
+    if json_transformed is None:
+        log(f"Failed to convert transcription for {media_file_path}")
+        return None
+
+    # Resolve targets now that the language is known
+    for target in resolve_targets(config, media_file_path, job.detected_language, job.plan.track):
+        tgt_abs_file_path = target.path
+
+        # Check if the output file already exists
+        match config.targetexists:
+            case 'skip':
+                if os.path.exists(tgt_abs_file_path):
+                    log(f"Skipping existing file: {tgt_abs_file_path}")
+                    continue
+            case 'rename':
+                base, ext = os.path.splitext(tgt_abs_file_path)
+                i = 0
+                while os.path.exists(tgt_abs_file_path):
+                    i += 1
+                    tgt_abs_file_path = f"{base}_{i}{ext}"
+                if i > 0:
+                    log(f"Avoiding collision by renaming existing file to: {tgt_abs_file_path}")
+            case 'overwrite':
+                if os.path.exists(tgt_abs_file_path):
+                  log(f"Overwriting existing file: {tgt_abs_file_path}")
+                pass
+
+        log("Writing to file...")
+        # Formatting and writing, block by block
+        with span("write"):
+            write_text_atomic(tgt_abs_file_path, json_transformed[target.job][target.targettype])
+        log(f"File written: {tgt_abs_file_path}")
+
+    return job
+
+STAGES = [(name, tracked_stage(name, func)) for name, func in (
+    ("decode", decode_stage),
+    ("transcribe", transcribe_stage),
+    ("translate", translate_stage),
+    ("write", write_stage)
+)]
+
+def process_media_file(config : Transcription, plans: list, run: str = None) -> bool:
+    """
+    Runs every stage for the planned tracks of a single media file, one after the other.
+    Returns False if the file could not be processed.
+    """
+    jobs = STAGES[0][1]([MediaJob(plan=plan, config=config, run=run) for plan in plans])
+    if jobs is None:
+        return False
+    for job in jobs:
+        for _, stage in STAGES[1:]:
+            job = stage(job)
+            if job is None:
+                return False
+    return True
+
+def transform_media_file(config : Transcription, media_file: str) -> list:
+    """
+    Transcribes (and translates) the planned tracks of a single media file and converts them
+    to every target format, without writing target files.
+    Returns the track, detected language and outputs of every track, or None if the file could not be processed.
+    """
+    plans = plan_media(config, [media_file])
+    if not plans:
+        return None
+    jobs = decode_stage([MediaJob(plan=plan, config=config) for plan in plans])
+    if jobs is None:
+        return None
+    results = []
+    for job in jobs:
+        for stage in (transcribe_stage, translate_stage):
+            job = stage(job)
+            if job is None:
+                return None
+        if transform_job(job) is None:
+            return None
+        results.append({
+            'track': job.plan.track,
+            'language': job.detected_language,
+            'outputs': {kind: {targettype: "".join(blocks) for targettype, blocks in formats.items()}
+                        for kind, formats in job.transformed.items() if formats is not None}
+        })
+    return results
+
+def cache_stats() -> dict:
+    """
+    Returns the counters of the caches used in this process.
+    """
+    return {
+        'Transcription cache': merge_stats([cache.stats() for cache in opened_transcription_caches()]),
+        'Translation memory': merge_stats([memory.stats() for memory in opened_translation_memories()]),
+        'Media index': merge_stats([index.stats() for index in opened_media_indexes()])
+    }
+
+def log_run_cache_stats(snapshots: list):
+    """
+    Logs the cache counters of one or more processes.
+    """
+    for name in ('Transcription cache', 'Translation memory', 'Media index'):
+        stats = merge_stats([snapshot[name] for snapshot in snapshots])
+        if stats['hits'] or stats['misses']:
+            log_cache_stats(name, stats)
+
+def set_torch_threads(threads: int):
+    """
+    Limits torch intra-op threads so concurrent workers do not oversubscribe the CPU.
+    """
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+def _init_pool_worker(threads: int):
+    """
+    Initializes a worker process.
+    """
+    suppress_warnings()
+    set_torch_threads(threads)
+
+def _process_media_file_captured(config : Transcription, plans: list, run: str = None) -> tuple:
+    """
+    Runs process_media_file in a worker process, capturing its log so the parent can print it in order.
+    """
+    configure_metrics(enabled=bool(config.metrics_path or config.prometheus_path))
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        try:
+            processed = process_media_file(config, plans, run)
+        except Exception as e:
+            log(f"ERROR: Processing failed {plans[0].media_file}: {e}")
+            processed = False
+    return processed, buffer.getvalue(), os.getpid(), (whisper_registry.stats(), marianmt_registry.stats(), cache_stats(), vad_stats(), metrics_snapshot())
+
+def process_media_parallel(config : Transcription, groups, run: str = None):
+    """
+    Processes media files on a pool of worker processes, each with its own warm Whisper model.
+    Files (with all their planned tracks) are submitted as they are found, a few ahead of the
+    workers; logs are printed in input order.
+    """
+    workers = config.workers
+    threads = config.threads if config.threads else max(1, (os.cpu_count() or 1) // workers)
+    if config.device == "cuda":
+        log(f"WARNING: {workers} worker processes will each load a model on the GPU")
+    log(f"Starting {workers} worker processes with {threads} torch threads each")
+
+    worker_stats = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=context,
+                             initializer=_init_pool_worker,
+                             initargs=(threads,)) as executor:
+        submitted = deque()
+        processed_count = 0
+        groups = iter(groups)
+        while True:
+            # Keep every worker busy with one file and one more waiting
+            while len(submitted) < workers * 2:
+                group = next(groups, None)
+                if group is None:
+                    break
+                submitted.append(executor.submit(_process_media_file_captured, config, group, run))
+            if not submitted:
+                break
+            processed, output, pid, stats = submitted.popleft().result()
+            processed_count += 1
+            log(f"Processed media file {processed_count} (worker {pid})")
+            print(output, end='')
+            worker_stats[pid] = stats
+            merge_metrics(stats[4])
+            if not processed:
+                log("Stopping remaining media files after failure")
+                executor.shutdown(wait=True, cancel_futures=True)
+                break
+
+    for name, index in (("Whisper", 0), ("MarianMT", 1)):
+        models = [value for stats in worker_stats.values() for value in stats[index].values()]
+        if not models:
+            continue
+        loads = sum(value['loads'] for value in models)
+        reuses = sum(value['reuses'] for value in models)
+        load_time = sum(value['load_time'] for value in models)
+        log(f"{name} models loaded {loads}x in {load_time:.2f}s across {len(worker_stats)} workers, reused {reuses}x")
+    log_run_cache_stats([stats[2] for stats in worker_stats.values()])
+    log_vad_stats([stats[3] for stats in worker_stats.values()])